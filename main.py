@@ -1,12 +1,20 @@
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands, ui
-from datetime import datetime
+from datetime import datetime, timedelta, time as dtime
+from zoneinfo import ZoneInfo
 import os
 import logging
 from dotenv import load_dotenv
-import requests
-import math
+import aiohttp
+import asyncio
+import json
+import orjson
+import hashlib
+import time
+import heapq
+import bisect
+import functools
 
 # Setup logging
 logging.basicConfig(
@@ -24,7 +32,14 @@ API_KEY = os.getenv("DISCORD_BOT_API_KEY", "")  # API key for authentication (op
 
 OFFICE_TRACKER_CHANNEL_NAME = os.getenv("OFFICE_TRACKER_CHANNEL_NAME", "office-tracker")
 WEEKLY_REPORT_CHANNEL_ID = os.getenv("WEEKLY_REPORT_CHANNEL_ID")  # Channel for automated weekly reports
+if WEEKLY_REPORT_CHANNEL_ID:
+    WEEKLY_REPORT_CHANNEL_ID = int(WEEKLY_REPORT_CHANNEL_ID)
 WEEKLY_REPORT_ENABLED = os.getenv("WEEKLY_REPORT_ENABLED", "false").strip().lower() in ("1", "true", "yes", "on")
+OFFICE_TZ = ZoneInfo("America/Toronto")
+WEEKLY_REPORT_TIME = dtime(hour=9, tzinfo=OFFICE_TZ)  # Posted Sundays at this time
+WEEKLY_REPORT_PREPARE_TIME = dtime(hour=8, minute=55, tzinfo=OFFICE_TZ)  # Built ahead of posting
+DASHBOARD_MESSAGES_FILE = os.getenv("DASHBOARD_MESSAGES_FILE", "dashboard_messages.json")  # Persisted dashboard message IDs
+COMMANDS_HASH_FILE = os.getenv("COMMANDS_HASH_FILE", ".commands_hash")  # Last synced command tree hashes
 
 # Optional guild IDs - only configured guilds will get dashboards
 COMMUNITY_GUILD_ID = os.getenv("COMMUNITY_GUILD_ID")
@@ -37,6 +52,9 @@ if EXEC_GUILD_ID:
 if COMMUNITY_GUILD_ID:
     GUILD_MAPPING[int(COMMUNITY_GUILD_ID)] = "VIEW_ONLY"  # The server with only Refresh
 
+# Scope of the exec-only slash commands, built once for every decorator
+EXEC_GUILD_OBJ = discord.Object(id=EXEC_GUILD_ID)
+
 # Build request headers with API key if configured
 REQUEST_HEADERS = {"Content-Type": "application/json"}
 if API_KEY:
@@ -53,137 +71,339 @@ ENDPOINTS = {
     "signout_discord": f"{SERVER_URL}/sign-out-discord",
 }
 
-LAST_REFRESH_TIME = None
+# Shared HTTP session for backend requests (opened in main(), reused for every call)
+http_session: aiohttp.ClientSession | None = None
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=5)
+LONG_REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10)  # For larger queries like /visits
+# aiohttp raises ClientError for connection/status errors and TimeoutError on timeouts
+HTTP_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+# ...plus ValueError (incl. orjson.JSONDecodeError) for a response body that isn't valid JSON
+BACKEND_ERRORS = HTTP_ERRORS + (ValueError,)
+# Keep idle backend connections open across auto-refresh ticks (aiohttp defaults to 15s)
+HTTP_KEEPALIVE_TIMEOUT = 75  # seconds
+# Admin sign-in/out POSTs are retried only when the request can't have been
+# processed yet: no connection, or a gateway status from in front of the backend
+# (not 504: the gateway already forwarded the request before timing out)
+BACKEND_POST_RETRIES = 2
+BACKEND_RETRY_BACKOFF = 0.2  # seconds, doubled after each attempt
+BACKEND_RETRY_STATUSES = {502, 503}
+
 REFRESH_COOLDOWN = 10  # seconds
+REFRESH_DEBOUNCE = 1  # seconds a follow-up refresh waits so a burst of requests shares it
+INTERACTION_FETCH_TIMEOUT = 2  # seconds a button click waits for data before deferring (Discord allows 3)
+
+LEAVE_COOLDOWN = 5  # seconds between "Leaving" clicks per user
+
+LEADERBOARD_CACHE_TTL = 120  # seconds a calculated leaderboard is reused
+# Longer windows change proportionally less between sign-outs (which clear the
+# cache once a dashboard refresh sees the attendee leave), so they're kept longer: days -> seconds
+LEADERBOARD_CACHE_TTLS = {30: 300, 120: 1800, 3650: 3600}
+VISITS_FETCH_LIMIT = 1000  # visits requested per leaderboard fetch
+ATTENDEES_CACHE_TTL = 2  # seconds a fetched attendee list is reused
+
+AUTO_REFRESH_INTERVAL = 60  # seconds, during office hours
+OFF_HOURS_REFRESH_INTERVAL = 300  # seconds, 11 PM - 7 AM
+# Unchanged dashboards are still re-pushed this often, so the "Last update" footer
+# lags at most one skipped refresh behind. Ages are measured from the start of
+# the refresh that pushed, so the next refresh's fetch and edit time count toward it.
+DASHBOARD_MAX_AGE = 2 * AUTO_REFRESH_INTERVAL  # seconds
+
+# Strong references to fire-and-forget tasks so they aren't garbage collected mid-run
+_background_tasks: set[asyncio.Task] = set()
 
 # Setup Intents
+# The privileged members intent isn't needed: slash command Member options and
+# interaction users are resolved from the interaction payload, not the member cache
 intents = discord.Intents.default()
-intents.members = True
 
 # Initialize Bot
-bot = commands.Bot(command_prefix="!", intents=intents)
+# No member chunking or member cache: nothing looks members up from the cache
+bot = commands.Bot(
+    command_prefix="!",
+    intents=intents,
+    chunk_guilds_at_startup=False,
+    member_cache_flags=discord.MemberCacheFlags.none(),
+)
 
 # -----------------------------
 # Data Storage
 # -----------------------------
-office_attendees: dict[str, datetime] = {}
-server_status: dict = {"ok": True, "error": None}
+class RefreshState:
+    """
+    Dashboard data and refresh bookkeeping, kept together so every refresh
+    path reads and updates the same object.
+    """
+    __slots__ = ("last_refresh", "attendees", "status", "task", "requested")
+
+    def __init__(self):
+        self.last_refresh: float | None = None  # time.monotonic() when the last refresh started (for the cooldown)
+        self.attendees: list[tuple[str, str]] = []  # (name, ISO 8601 signin time), in arrival order
+        self.status: dict = {"ok": True, "error": None}  # Backend status shown on the dashboard
+        self.task: asyncio.Task | None = None  # In-flight refresh shared by concurrent callers
+        self.requested = False  # Set when a refresh is requested while one is running
+
+
+STATE = RefreshState()
+# user_id -> time.monotonic() of their last accepted "Leaving" click
+_user_leave_cooldown: dict[int, float] = {}
+# (time.monotonic(), embed or None if there was no data) of the prepared weekly report
+_WEEKLY_REPORT_CACHE: tuple[float, discord.Embed | None] | None = None
+# (days, top_n) -> (time.monotonic(), leaderboard_data) for recently calculated leaderboards
+_LB_CACHE: dict[tuple[int, int], tuple[float, list]] = {}
+# days -> (time.monotonic(), visits, signin_days, complete) for recently fetched visit
+# windows, where visits are pre-parsed (name, signin day, hours) tuples without
+# auto-signouts sorted by signin day, signin_days is that column (for bisecting)
+# and complete means the fetch wasn't cut off at VISITS_FETCH_LIMIT
+_VISITS_CACHE: dict[int, tuple[float, list[tuple[str, str, float]], list[str], bool]] = {}
+# Last successful /current response: its ETag, raw body and the attendees
+# parsed from it, so an unchanged response isn't parsed again
+_CURRENT_RESPONSE: dict = {"etag": None, "body": None, "attendees": []}
+# (time.monotonic() at request start, attendees, is_success) of the last /current fetch
+_ATTENDEES_CACHE: tuple[float, list, bool] | None = None
+# time.monotonic() of the last invalidation; fetches started before it aren't cached
+_attendees_invalidated_at = 0.0
+# Resolved weekly report channel (reset on_ready and if it's deleted)
+_weekly_report_channel: discord.abc.Messageable | None = None
+# guild_id -> resolved office tracker channel, or None if the guild has none
+# (filled in on_ready, invalidated by channel events)
+CHANNEL_CACHE: dict[int, discord.TextChannel | None] = {}
+
+
+def load_dashboard_messages() -> dict[int, int]:
+    """
+    Loads the guild_id -> dashboard message ID mapping saved by /setup.
+    Returns an empty mapping if the file is missing or unreadable.
+    """
+    try:
+        with open(DASHBOARD_MESSAGES_FILE) as f:
+            return {int(guild_id): int(msg_id) for guild_id, msg_id in json.load(f).items()}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError, AttributeError) as e:
+        logger.warning(f"Could not load dashboard message IDs: {e}")
+        return {}
+
+
+def save_dashboard_messages():
+    """Persists DASHBOARD_MESSAGES so restarts don't need to search channel history."""
+    try:
+        with open(DASHBOARD_MESSAGES_FILE, "w") as f:
+            json.dump({str(guild_id): msg_id for guild_id, msg_id in DASHBOARD_MESSAGES.items()}, f)
+    except OSError as e:
+        logger.error(f"Could not save dashboard message IDs: {e}")
+
+
+# guild_id -> dashboard message ID, so refreshes can edit it without reading history
+DASHBOARD_MESSAGES: dict[int, int] = load_dashboard_messages()
+# guild_id -> (content signature, time.monotonic()) of the last successful dashboard edit
+PUSHED_DASHBOARDS: dict[int, tuple[str, float]] = {}
 
 # -----------------------------
 # Helpers
 # -----------------------------
 
 
-def get_current_office_attendees():
+async def get_current_office_attendees():
     """
     Fetches the current office attendees from the server, sorted by signin time.
-    Returns tuple: (attendees_dict, is_success)
+    Returns tuple: (attendees, is_success)
+    attendees is a list of (name, ISO 8601 signin time) tuples.
+    Also records the backend status in STATE.status.
+    The request is conditional (If-None-Match), so an unchanged attendee list
+    costs a 304 instead of a download; if the backend doesn't send ETags, an
+    identical body still skips re-parsing. Results are reused for
+    ATTENDEES_CACHE_TTL seconds, so bursts of refreshes make one request.
     """
-    global server_status
+    global _ATTENDEES_CACHE
+    if _ATTENDEES_CACHE and time.monotonic() - _ATTENDEES_CACHE[0] < ATTENDEES_CACHE_TTL:
+        return _ATTENDEES_CACHE[1], _ATTENDEES_CACHE[2]
+
+    started = time.monotonic()
+    result = await _fetch_current_office_attendees()
+    # A sign-in/out during the request may not be reflected in its response
+    if started > _attendees_invalidated_at:
+        _ATTENDEES_CACHE = (started, *result)
+    return result
+
+
+def invalidate_attendees_cache():
+    """Drops the cached attendee list, e.g. after a sign-in or sign-out."""
+    global _ATTENDEES_CACHE, _attendees_invalidated_at
+    _ATTENDEES_CACHE = None
+    _attendees_invalidated_at = time.monotonic()
+
+
+async def _fetch_current_office_attendees():
+    """Requests /current from the backend (see get_current_office_attendees)."""
+    cached = _CURRENT_RESPONSE
+    headers = {"If-None-Match": cached["etag"]} if cached["etag"] else None
     try:
-        response = requests.get(
-            ENDPOINTS["current"], headers=REQUEST_HEADERS, timeout=5
-        )
-        response.raise_for_status()
-        data = response.json()
+        async with http_session.get(ENDPOINTS["current"], headers=headers) as response:
+            if response.status == 304:
+                STATE.status = {"ok": True, "error": None}
+                return cached["attendees"], True
+            response.raise_for_status()
+            etag = response.headers.get("ETag")
+            body = await response.read()
+
+        if body == cached["body"]:
+            cached["etag"] = etag
+            STATE.status = {"ok": True, "error": None}
+            return cached["attendees"], True
+
+        data = orjson.loads(body)
 
         # Handle None or empty response
         if data is None:
             logger.warning("API returned null response for current attendees")
-            server_status = {"ok": False, "error": "Null response from server"}
-            return {}, False
-
-        attendees = {
-            entry["name"]: datetime.fromisoformat(entry["signin_time"])
-            for entry in data
-        }
-        server_status = {"ok": True, "error": None}
+            STATE.status = {"ok": False, "error": "Null response from server"}
+            return [], False
+
+        # Keep the raw ISO timestamps; the dashboard only needs their HH:MM part
+        attendees = [(entry["name"], entry["signin_time"]) for entry in data]
+        cached.update(etag=etag, body=body, attendees=attendees)
+        STATE.status = {"ok": True, "error": None}
         return attendees, True
-    except requests.RequestException as e:
-        logger.error(f"Error fetching current office attendees: {e}")
-        server_status = {"ok": False, "error": str(e)}
-        return {}, False
+    except HTTP_ERRORS as e:
+        logger.error(f"Error fetching current office attendees: {e!r}")
+        # Timeouts carry no message, so fall back to the exception type
+        STATE.status = {"ok": False, "error": str(e) or type(e).__name__}
+        return [], False
     except (KeyError, ValueError) as e:
         logger.error(f"Error parsing attendee data: {e}")
-        server_status = {"ok": False, "error": f"Data parsing error: {e}"}
-        return {}, False
+        STATE.status = {"ok": False, "error": f"Data parsing error: {e}"}
+        return [], False
+
+
+def invalidate_leaderboard_cache():
+    """Drops cached leaderboards, e.g. after a sign-out creates a new visit."""
+    _LB_CACHE.clear()
+    _VISITS_CACHE.clear()
+
+
+# Visits never change once completed, so refetches after a cache
+# invalidation can reuse earlier parses (bounded to a few fetches' worth)
+@functools.lru_cache(maxsize=4 * VISITS_FETCH_LIMIT)
+def visit_hours(signin: str, signout: str) -> float:
+    """Returns the length in hours of a visit given its ISO 8601 timestamps."""
+    return (datetime.fromisoformat(signout) - datetime.fromisoformat(signin)).total_seconds() / 3600
+
+
+async def fetch_leaderboard_visits(days: int, force: bool = False) -> list[tuple[str, str, float]]:
+    """
+    Returns the completed visits of the last `days` days as (name, signin day
+    "YYYY-MM-DD", hours) tuples sorted by signin day, without 4 AM
+    auto-signouts or visits over 24h.
+    A cached complete fetch of a longer window is sliced down instead of
+    fetching again, so e.g. /leaderboard month then week makes one request.
+    Raises HTTP_ERRORS if the backend can't be reached, or ValueError if its
+    reply isn't valid JSON.
+    """
+    ttl = LEADERBOARD_CACHE_TTLS.get(days, LEADERBOARD_CACHE_TTL)
+    now = datetime.now()
+    if not force:
+        for fetched_days, (fetched_at, visits, signin_days, complete) in _VISITS_CACHE.items():
+            if time.monotonic() - fetched_at >= ttl:
+                continue
+            if fetched_days == days:
+                return visits
+            if complete and fetched_days > days:
+                cutoff = (now - timedelta(days=days)).strftime("%Y-%m-%d")
+                return visits[bisect.bisect_left(signin_days, cutoff):]
+
+    from_date = (now - timedelta(days=days)).strftime("%Y-%m-%dT00:00:00Z")
+    to_date = now.strftime("%Y-%m-%dT23:59:59Z")
+    params = {"from": from_date, "to": to_date, "limit": VISITS_FETCH_LIMIT}
+    async with http_session.get(
+        ENDPOINTS["visits"], params=params, timeout=LONG_REQUEST_TIMEOUT
+    ) as response:
+        response.raise_for_status()
+        raw_visits = orjson.loads(await response.read())
+
+    visits = []
+    for visit in raw_visits or ():
+        signin = visit.get("signin_time", "")
+        signout = visit.get("signout_time", "")
+        try:
+            # Filter out auto-signouts at 4 AM (nightly cleanup) before parsing;
+            # in ISO 8601 (YYYY-MM-DDTHH:MM...) [11:16] is the HH:MM part
+            if signout[11:16] == "04:00":
+                continue
 
+            duration_hours = visit_hours(signin, signout)
+
+            # Skip unreasonably long visits (>24 hours, likely errors)
+            if duration_hours > 24:
+                continue
 
-def calculate_leaderboard(days: int = 7, top_n: int = 10):
+            visits.append((visit.get("name", "Unknown"), signin[:10], duration_hours))
+        except Exception as e:
+            logger.warning(f"Error processing visit: {e}")
+            continue
+
+    # Sorted by day, so shorter windows are a tail slice of this one
+    visits.sort(key=lambda visit: visit[1])
+    complete = len(raw_visits or ()) < VISITS_FETCH_LIMIT
+    _VISITS_CACHE[days] = (time.monotonic(), visits, [visit[1] for visit in visits], complete)
+    return visits
+
+
+async def calculate_leaderboard(days: int = 7, top_n: int = 10, force: bool = False):
     """
     Fetches visit data and calculates leaderboard statistics.
     Filters out auto-signouts at 4 AM (nightly cleanup).
+    Results are reused for LEADERBOARD_CACHE_TTLS[days] seconds
+    (LEADERBOARD_CACHE_TTL for other windows).
     
     Args:
         days: Number of days to look back
         top_n: Number of top members to return
+        force: Skip the cache and recalculate
     
     Returns:
         tuple: (leaderboard_data, error_message)
                leaderboard_data is list of dicts with: name, visits, total_hours, avg_hours
     """
+    cache_key = (days, top_n)
+    cached = _LB_CACHE.get(cache_key)
+    ttl = LEADERBOARD_CACHE_TTLS.get(days, LEADERBOARD_CACHE_TTL)
+    if not force and cached and time.monotonic() - cached[0] < ttl:
+        return cached[1], None
+
     try:
-        # Calculate date range
-        from_date = (datetime.now() - __import__('datetime').timedelta(days=days)).strftime("%Y-%m-%dT00:00:00Z")
-        to_date = datetime.now().strftime("%Y-%m-%dT23:59:59Z")
-        
-        # Fetch visits
-        params = {"from": from_date, "to": to_date, "limit": 1000}
-        response = requests.get(
-            ENDPOINTS["visits"], params=params, headers=REQUEST_HEADERS, timeout=10
-        )
-        response.raise_for_status()
-        visits = response.json()
-        
+        visits = await fetch_leaderboard_visits(days, force=force)
         if not visits:
             return [], None
         
-        # Aggregate by member, filtering out 4 AM auto-signouts
-        member_stats = {}
-        for visit in visits:
-            name = visit.get("name", "Unknown")
-            signin = visit.get("signin_time", "")
-            signout = visit.get("signout_time", "")
-            
-            try:
-                signin_dt = datetime.fromisoformat(signin)
-                signout_dt = datetime.fromisoformat(signout)
-                
-                # Filter out auto-signouts at 4 AM (nightly cleanup)
-                if signout_dt.hour == 4 and signout_dt.minute == 0:
-                    continue
-                
-                duration_hours = (signout_dt - signin_dt).total_seconds() / 3600
-                
-                # Skip unreasonably long visits (>24 hours, likely errors)
-                if duration_hours > 24:
-                    continue
-                
-                if name not in member_stats:
-                    member_stats[name] = {"visits": 0, "total_hours": 0}
-                
-                member_stats[name]["visits"] += 1
-                member_stats[name]["total_hours"] += duration_hours
-            except Exception as e:
-                logger.warning(f"Error processing visit: {e}")
-                continue
+        # Aggregate by member; stats is a mutable [visits, total_hours] pair
+        member_stats: dict[str, list] = {}
+        for name, _, duration_hours in visits:
+            stats = member_stats.get(name)
+            if stats is None:
+                member_stats[name] = [1, duration_hours]
+            else:
+                stats[0] += 1
+                stats[1] += duration_hours
         
-        # Calculate averages and format
-        leaderboard = []
-        for name, stats in member_stats.items():
-            leaderboard.append({
-                "name": name,
-                "visits": stats["visits"],
-                "total_hours": stats["total_hours"],
-                "avg_hours": stats["total_hours"] / stats["visits"] if stats["visits"] > 0 else 0
-            })
+        # Pick the top members by visits (primary) and total hours (secondary);
+        # nlargest keeps ties in first-seen order, like a stable reverse sort
+        top_members = heapq.nlargest(top_n, member_stats.items(), key=lambda item: (item[1][0], item[1][1]))
         
-        # Sort by visits (primary) and total hours (secondary)
-        leaderboard.sort(key=lambda x: (x["visits"], x["total_hours"]), reverse=True)
+        # Calculate averages and format only for the members being shown
+        leaderboard = [
+            {
+                "name": name,
+                "visits": visit_count,
+                "total_hours": total_hours,
+                "avg_hours": total_hours / visit_count,
+            }
+            for name, (visit_count, total_hours) in top_members
+        ]
         
-        return leaderboard[:top_n], None
+        _LB_CACHE[cache_key] = (time.monotonic(), leaderboard)
+        return leaderboard, None
         
-    except requests.RequestException as e:
+    except HTTP_ERRORS as e:
         logger.error(f"Error fetching leaderboard data: {e}")
         return [], f"Failed to fetch data: {e}"
     except Exception as e:
@@ -191,7 +411,101 @@ def calculate_leaderboard(days: int = 7, top_n: int = 10):
         return [], f"Error processing data: {e}"
 
 
-def build_leaderboard_embed(leaderboard_data: list, title: str, days: int = None, footer_text: str = None) -> discord.Embed:
+_FMT_VISIT_START = "%Y-%m-%d %H:%M"  # Date and sign-in time of a visit line
+_FMT_TIME = "%H:%M"
+
+
+def format_visit(visit: dict) -> str:
+    """
+    Formats a single visit as a list line with date, times and duration.
+    Falls back to the raw timestamps if they can't be parsed.
+    """
+    name = visit.get("name", "Unknown")
+    signin = visit.get("signin_time", "")
+    signout = visit.get("signout_time", "")
+
+    try:
+        signin_dt = datetime.fromisoformat(signin)
+        signout_dt = datetime.fromisoformat(signout)
+        duration_secs = (signout_dt - signin_dt).total_seconds()  # TypeError if only one has a UTC offset
+    except (TypeError, ValueError):
+        return f"• **{name}** — {signin} to {signout}"
+
+    duration_str = f"{duration_secs / 3600:.1f}h" if duration_secs >= 3600 else f"{duration_secs / 60:.0f}m"
+    return (
+        f"• **{name}** — {signin_dt.strftime(_FMT_VISIT_START)}-"
+        f"{signout_dt.strftime(_FMT_TIME)} ({duration_str})"
+    )
+
+
+def run_in_background(coro) -> asyncio.Task:
+    """
+    Schedules a coroutine without awaiting it, keeping a reference until it finishes.
+    """
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+async def backend_post(interaction: discord.Interaction, endpoint: str, action: str, payload: dict = None) -> bool:
+    """
+    POSTs to ENDPOINTS[endpoint] on behalf of a deferred interaction, retrying
+    transient failures with backoff. If it still fails, logs the error and
+    tells the user "Failed to <action>".
+    Returns True if the backend accepted the request.
+    """
+    for attempt in range(BACKEND_POST_RETRIES + 1):
+        if attempt:
+            await asyncio.sleep(BACKEND_RETRY_BACKOFF * 2 ** (attempt - 1))
+        try:
+            async with http_session.post(ENDPOINTS[endpoint], json=payload) as response:
+                response.raise_for_status()
+            return True
+        except aiohttp.ClientResponseError as e:
+            error = e
+            if e.status not in BACKEND_RETRY_STATUSES:
+                break
+        except aiohttp.ClientConnectorError as e:
+            error = e
+        except HTTP_ERRORS as e:
+            # E.g. a timeout: the backend may have applied it, so don't repeat it
+            error = e
+            break
+
+    logger.error(f"Error calling {endpoint} ({payload}): {error!r}")
+    # Timeouts carry no message, so fall back to the exception type
+    await interaction.followup.send(f"❌ Failed to {action}: {str(error) or type(error).__name__}", ephemeral=True)
+    return False
+
+
+def get_tracker_channel(guild: discord.Guild) -> discord.TextChannel | None:
+    """
+    Returns the office tracker channel for a guild, caching the lookup so
+    refreshes don't rescan every text channel.
+    """
+    if guild.id in CHANNEL_CACHE:
+        return CHANNEL_CACHE[guild.id]
+    channel = discord.utils.get(guild.text_channels, name=OFFICE_TRACKER_CHANNEL_NAME)
+    CHANNEL_CACHE[guild.id] = channel
+    return channel
+
+
+def day_to_rfc3339(day: str, time_suffix: str) -> str:
+    """
+    Converts a YYYY-MM-DD command argument to the backend's RFC3339 format,
+    e.g. ("2024-01-15", "T00:00:00Z") -> "2024-01-15T00:00:00Z".
+    Raises ValueError for anything that isn't a valid calendar date.
+    """
+    return datetime.strptime(day, "%Y-%m-%d").strftime("%Y-%m-%d") + time_suffix
+
+
+MEDALS = ("🥇", "🥈", "🥉")
+VISIT_WORDS = ("visits", "visit")  # Indexed by (visits == 1)
+
+
+def build_leaderboard_embed(leaderboard_data: list, title: str, days: int = None, footer_text: str = None,
+                            description_prefix: str = "", color: int = 0xFFD700) -> discord.Embed:
     """
     Builds a leaderboard embed from leaderboard data.
     
@@ -200,28 +514,22 @@ def build_leaderboard_embed(leaderboard_data: list, title: str, days: int = None
         title: Embed title
         days: Number of days (for footer)
         footer_text: Optional custom footer text
+        description_prefix: Optional text shown above the ranking
+        color: Embed color (gold by default)
     
     Returns:
         discord.Embed with formatted leaderboard
     """
-    description_lines = []
-    
-    medals = ["🥇", "🥈", "🥉"]
-    for idx, member in enumerate(leaderboard_data):
-        rank = idx + 1
-        medal = medals[idx] if idx < 3 else f"{rank}."
-        
-        hours_str = f"{member['total_hours']:.1f}h"
-        visits_str = f"{member['visits']} visit{'s' if member['visits'] != 1 else ''}"
-        
-        description_lines.append(
-            f"{medal} **{member['name']}** — {visits_str} ({hours_str})"
-        )
+    description_lines = [
+        f"{MEDALS[idx] if idx < len(MEDALS) else f'{idx + 1}.'} **{member['name']}** — "
+        f"{member['visits']} {VISIT_WORDS[member['visits'] == 1]} ({member['total_hours']:.1f}h)"
+        for idx, member in enumerate(leaderboard_data)
+    ]
     
     embed = discord.Embed(
         title=title,
-        description="\n".join(description_lines),
-        color=0xFFD700,  # Gold
+        description=description_prefix + "\n".join(description_lines),
+        color=color,
     )
     
     # Set footer
@@ -243,22 +551,52 @@ class BaseOfficeView(ui.View):
         super().__init__(timeout=None)
 
     async def do_refresh(self, interaction: discord.Interaction):
-        # Acknowledge the click immediately to prevent "Interaction Failed"
-        await interaction.response.defer()
-        global LAST_REFRESH_TIME
-
-        now = datetime.now()
-        if LAST_REFRESH_TIME is not None:
-            elapsed = (now - LAST_REFRESH_TIME).total_seconds()
+        now = time.monotonic()
+        if STATE.last_refresh is not None:
+            elapsed = now - STATE.last_refresh
             if elapsed < REFRESH_COOLDOWN:
-                wait = math.ceil(REFRESH_COOLDOWN - elapsed)
-                await interaction.followup.send(
+                wait = -int((elapsed - REFRESH_COOLDOWN) // 1)  # Seconds left, rounded up
+                await interaction.response.send_message(
                     f"Please wait {wait} second(s) before refreshing.", ephemeral=True
                 )
                 return
 
-        # Trigger a global update across all servers
-        await global_refresh()
+        # Claim the cooldown window right away (no await between the check and
+        # this write), so a simultaneous click sees it instead of refreshing too
+        STATE.last_refresh = now
+
+        # A refresh already in flight is fetching the same data; join it rather
+        # than fetching again and racing it for STATE
+        if STATE.task is not None and not STATE.task.done():
+            await interaction.response.defer()
+            await global_refresh()
+            return
+
+        # Update the clicked message as the interaction response itself (no
+        # separate defer round-trip), then update the other guilds in the background.
+        # If the backend is slow, acknowledge the click before the interaction
+        # expires and let the regular refresh update every guild instead.
+        try:
+            embed = await asyncio.wait_for(build_dashboard_embed(), timeout=INTERACTION_FETCH_TIMEOUT)
+        except asyncio.TimeoutError:
+            await interaction.response.defer()
+            await global_refresh()
+            return
+        guild_id = interaction.guild_id
+        try:
+            await interaction.response.edit_message(embed=embed)
+        except discord.HTTPException as e:
+            # The interaction may have expired while fetching; update every guild normally
+            logger.warning(f"Could not update clicked dashboard directly: {e}")
+            guild_id = None
+        else:
+            if DASHBOARD_MESSAGES.get(guild_id) == interaction.message.id:
+                PUSHED_DASHBOARDS[guild_id] = (embed_signature(embed), now)
+            else:
+                guild_id = None  # Clicked an older message; still update the tracked dashboard
+
+        # Through the shared refresh task, so this push can't land after a newer refresh
+        run_in_background(global_refresh(embed=embed, exclude=guild_id))
 
 
 class ReadOnlyView(BaseOfficeView):
@@ -285,21 +623,36 @@ class ControlView(BaseOfficeView):
         # Acknowledge the click immediately to prevent "Interaction Failed"
         await interaction.response.defer()
 
-        # Make request to sign out user using Discord ID
+        # Ignore repeated clicks (e.g. double-clicks) while one is being handled
         user_id = interaction.user.id
+        now = time.monotonic()
+        if now - _user_leave_cooldown.get(user_id, float("-inf")) < LEAVE_COOLDOWN:
+            await interaction.followup.send(
+                "Your sign-out has already been processed.", ephemeral=True
+            )
+            return
+        _user_leave_cooldown[user_id] = now
+
+        # Make request to sign out user using Discord ID
         try:
-            response = requests.post(
+            async with http_session.post(
                 ENDPOINTS["signout_discord"],
                 json={"discord_id": str(user_id)},
-                headers=REQUEST_HEADERS,
-                timeout=5,
-            )
-            response.raise_for_status()
-        except requests.RequestException as e:
+            ) as response:
+                response.raise_for_status()
+                body = await response.read()
+        except HTTP_ERRORS as e:
             logger.error(f"Error signing out user {user_id}: {e}")
+            _user_leave_cooldown.pop(user_id, None)  # Let the user retry right away
             return
 
-        logger.debug(f"{response.json()['message']}")
+        # The reply is only logged, so a malformed one doesn't undo the sign-out
+        try:
+            logger.debug(f"{orjson.loads(body)['message']}")
+        except (ValueError, KeyError, TypeError):
+            logger.debug(f"Signed out user {user_id}, unexpected reply: {body[:200]!r}")
+        invalidate_leaderboard_cache()  # The sign-out completed a visit
+        invalidate_attendees_cache()
 
         # Update EVERY server
         await global_refresh()
@@ -313,6 +666,14 @@ class ControlView(BaseOfficeView):
         await self.do_refresh(interaction)
 
 
+# Shared persistent views (created in setup_hook, since views need a running event loop).
+# They are stateless, so one instance per type serves every dashboard message.
+CONTROL_VIEW: ControlView | None = None
+READONLY_VIEW: ReadOnlyView | None = None
+# guild_id -> view for that guild's dashboard, resolved once from GUILD_MAPPING
+GUILD_VIEWS: dict[int, BaseOfficeView] = {}
+
+
 class PaginatedView(ui.View):
     """
     A reusable paginated view with Previous/Next buttons.
@@ -322,6 +683,8 @@ class PaginatedView(ui.View):
         self.pages = pages
         self.current_page = 0
         self.max_page = len(pages) - 1
+        # Footers as given, so page info isn't appended on top of itself
+        self._base_footers = [page.footer.text or "" for page in pages]
         
         # Update button states for initial page
         self.update_buttons()
@@ -334,13 +697,10 @@ class PaginatedView(ui.View):
     def get_current_embed(self) -> discord.Embed:
         """Get the embed for the current page with page indicator."""
         embed = self.pages[self.current_page]
-        # Preserve existing footer if present, append page info
-        current_footer = embed.footer.text if embed.footer else ""
-        if current_footer:
-            page_info = f" • Page {self.current_page + 1}/{self.max_page + 1}"
-        else:
-            page_info = f"Page {self.current_page + 1}/{self.max_page + 1}"
-        embed.set_footer(text=current_footer + page_info)
+        # Preserve the original footer if present, append page info
+        base_footer = self._base_footers[self.current_page]
+        page_info = f"Page {self.current_page + 1}/{self.max_page + 1}"
+        embed.set_footer(text=f"{base_footer} • {page_info}" if base_footer else page_info)
         return embed
     
     @ui.button(label="◀ Previous", style=discord.ButtonStyle.gray, custom_id="paginated_prev")
@@ -393,43 +753,153 @@ def create_pages(items: list, items_per_page: int, title: str,
     Returns:
         List of Discord embeds (one per page)
     """
-    pages = []
-    total_pages = (len(items) + items_per_page - 1) // items_per_page  # Ceiling division
-    
-    for page_num in range(total_pages):
-        start_idx = page_num * items_per_page
-        end_idx = min(start_idx + items_per_page, len(items))
-        page_items = items[start_idx:end_idx]
-        
-        description = "\n".join([formatter(item) for item in page_items])
-        
-        embed = discord.Embed(
+    lines = list(map(formatter, items))
+    return [
+        discord.Embed(
             title=title,
-            description=description,
+            description="\n".join(lines[start_idx:start_idx + items_per_page]),
             color=color,
         )
-        pages.append(embed)
-    
-    return pages
+        for start_idx in range(0, len(lines), items_per_page)
+    ]
 
 
 # -----------------------------
 # Global Update Logic
 # -----------------------------
-async def global_refresh():
+def embed_signature(embed: discord.Embed) -> str:
+    """
+    Returns a comparable snapshot of the embed's content, so unchanged
+    dashboards can be detected. The "Last update" footer is left out, so a
+    new minute alone doesn't cause an edit.
+    """
+    content = embed.to_dict()
+    content.pop("footer", None)
+    return json.dumps(content, sort_keys=True)
+
+
+async def _update_guild(guild_id: int, embed: discord.Embed, signature: str, started: float):
+    """
+    Pushes the dashboard embed to a single guild's office tracker channel.
+    Skips the edit if this guild already shows exactly this content, unless
+    it was pushed more than DASHBOARD_MAX_AGE seconds ago.
+    started: time.monotonic() when this refresh started, recorded as the push time.
+    """
+    pushed = PUSHED_DASHBOARDS.get(guild_id)
+    if pushed and pushed[0] == signature and time.monotonic() - pushed[1] < DASHBOARD_MAX_AGE:
+        return
+
+    guild = bot.get_guild(guild_id)
+    if not guild:
+        return  # Bot might not be in the server yet
+
+    channel = get_tracker_channel(guild)
+    if not channel:
+        return  # Channel doesn't exist in this server
+
+    # Edit the known dashboard message directly (no history fetch needed).
+    # It was posted by /setup with this guild's persistent view attached, so
+    # the buttons are already there and only the embed has to be sent.
+    message_id = DASHBOARD_MESSAGES.get(guild_id)
+    if message_id is not None:
+        try:
+            await channel.get_partial_message(message_id).edit(embed=embed)
+            PUSHED_DASHBOARDS[guild_id] = (signature, started)
+            return
+        except discord.NotFound:
+            logger.warning(f"Dashboard message {message_id} in {guild.name} no longer exists, searching history.")
+            del DASHBOARD_MESSAGES[guild_id]
+            save_dashboard_messages()
+        except discord.HTTPException as e:
+            logger.error(f"Failed to edit message in {guild.name}: {e}")
+            return
+
+    # Fall back to finding the last message by the bot (the dashboard is
+    # normally the newest one) and remember it for the next refresh. The
+    # view is re-attached here in case that message's buttons are outdated.
+    view_to_use = GUILD_VIEWS[guild_id]
+    try:
+        async for msg in channel.history(limit=5):
+            if msg.author == bot.user:
+                DASHBOARD_MESSAGES[guild_id] = msg.id
+                save_dashboard_messages()
+                try:
+                    await msg.edit(embed=embed, view=view_to_use)
+                    PUSHED_DASHBOARDS[guild_id] = (signature, started)
+                except discord.HTTPException as e:
+                    logger.error(f"Failed to edit message in {guild.name}: {e}")
+                break
+    except discord.DiscordServerError as e:
+        logger.error(f"Discord server error while fetching history in {guild.name}: {e}. Skipping this guild.")
+    except discord.HTTPException as e:
+        logger.error(f"HTTP error while fetching history in {guild.name}: {e}. Skipping this guild.")
+
+
+async def global_refresh(attendees_override: list[tuple[str, str]] = None,
+                         embed: discord.Embed = None, exclude: int = None):
     """
     Updates the dashboard in ALL configured guilds.
+    Concurrent calls are coalesced into the refresh already in flight; if a
+    call arrives mid-refresh, one follow-up refresh runs REFRESH_DEBOUNCE
+    seconds afterwards so changes made in the meantime are still picked up.
+    attendees_override: Known attendee state (e.g. [] after signing everyone
+    out) to show instead of fetching it from the backend.
+    embed: An already-built dashboard (e.g. from a button click) to push
+    instead of building one; exclude is the guild already showing it.
+    """
+    if STATE.task is None or STATE.task.done():
+        STATE.task = asyncio.create_task(_run_refreshes(attendees_override, embed, exclude))
+    else:
+        # The follow-up refresh fetches fresh data, which is at least as current as the override
+        STATE.requested = True
+    # Shield so a cancelled caller doesn't cancel the refresh other callers are waiting on
+    await asyncio.shield(STATE.task)
+
+
+async def _run_refreshes(attendees_override: list[tuple[str, str]] = None,
+                         embed: discord.Embed = None, exclude: int = None):
+    while True:
+        STATE.requested = False
+        if embed is not None:
+            await push_dashboards(embed, exclude=exclude)
+        else:
+            await _refresh_dashboards(attendees_override)
+        # Follow-up refreshes fetch from the backend and update every guild
+        attendees_override = embed = None
+        if not STATE.requested:
+            break
+        # Requests made while waiting set STATE.requested again and are covered by this run
+        await asyncio.sleep(REFRESH_DEBOUNCE)
+
+
+async def _refresh_dashboards(attendees_override: list[tuple[str, str]] = None):
+    """
+    Fetches the current attendees and pushes the dashboard to every guild.
+    Use global_refresh() instead of calling this directly.
     """
-    global LAST_REFRESH_TIME
     logger.info("Triggering global dashboard refresh...")
-    LAST_REFRESH_TIME = datetime.now()
+    await push_dashboards(await build_dashboard_embed(attendees_override))
 
-    # 1. Build the Embed Content (Shared across both)
-    global office_attendees, server_status
-    office_attendees, is_success = get_current_office_attendees()
+
+async def build_dashboard_embed(attendees_override: list[tuple[str, str]] = None) -> discord.Embed:
+    """
+    Fetches the current attendees and builds the dashboard embed shared by all guilds.
+    attendees_override: Known attendee state to use instead of fetching it.
+    """
+    STATE.last_refresh = time.monotonic()
+    if attendees_override is None:
+        previous = STATE.attendees
+        STATE.attendees, is_success = await get_current_office_attendees()
+        # Most sign-outs happen on the RFID reader or in the 4 AM cleanup, not
+        # through the bot; an attendee dropping out means a visit was completed
+        if is_success and not set(previous) <= set(STATE.attendees):
+            invalidate_leaderboard_cache()
+    else:
+        STATE.attendees, is_success = attendees_override, True
+        STATE.status = {"ok": True, "error": None}
 
     # Check server status and build appropriate embed
-    if not server_status["ok"]:
+    if not is_success:
         # Server error
         embed = discord.Embed(
             title="🏢 IEEE Office Presence",
@@ -438,21 +908,22 @@ async def global_refresh():
         )
         embed.add_field(
             name="Error:",
-            value=f"Unable to fetch data from server.\n```{server_status['error']}```",
+            value=f"Unable to fetch data from server.\n```{STATE.status['error']}```",
             inline=False,
         )
-        embed.set_footer(text=f"Last update: {datetime.now().strftime('%H:%M:%S')}")
+        embed.set_footer(text=f"Last update: {datetime.now().strftime('%H:%M')}")
     else:
         # Server OK
-        if len(office_attendees) == 0:
+        if not STATE.attendees:
             description = "No one is currently in the office."
             color = 0x95A5A6  # Grey
         else:
             # Sort by arrival time (already sorted from backend)
+            # ISO 8601 is YYYY-MM-DDTHH:MM:SS..., so [11:16] is the HH:MM arrival time
             member_list = "\n".join(
                 [
-                    f"• **{name}** (since {time.strftime('%H:%M')})"
-                    for name, time in office_attendees.items()
+                    f"• **{name}** (since {signin_time[11:16]})"
+                    for name, signin_time in STATE.attendees
                 ]
             )
             description = f"**Currently in office:**\n{member_list}"
@@ -463,39 +934,26 @@ async def global_refresh():
             description=description,
             color=color,
         )
-        embed.set_footer(text=f"Last update: {datetime.now().strftime('%H:%M:%S')}")
-
-    # 2. Iterate through our configured guilds
-    for guild_id, mode in GUILD_MAPPING.items():
-        guild = bot.get_guild(guild_id)
-        if not guild:
-            continue  # Bot might not be in the server yet
+        embed.set_footer(text=f"Last update: {datetime.now().strftime('%H:%M')}")
 
-        channel = discord.utils.get(
-            guild.text_channels, name=OFFICE_TRACKER_CHANNEL_NAME
-        )
-        if not channel:
-            continue  # Channel doesn't exist in this server
+    return embed
 
-        # Determine which View (buttons) to use for this specific server
-        view_to_use = ControlView() if mode == "CONTROL" else ReadOnlyView()
 
-        # Find the last message by the bot and edit it
-        # NOTE: Could save Message IDs to a file to avoid history scraping)
-        try:
-            async for msg in channel.history(limit=10):
-                if msg.author == bot.user:
-                    try:
-                        await msg.edit(embed=embed, view=view_to_use)
-                    except discord.HTTPException as e:
-                        logger.error(f"Failed to edit message in {guild.name}: {e}")
-                    break
-        except discord.DiscordServerError as e:
-            logger.error(f"Discord server error while fetching history in {guild.name}: {e}. Skipping this guild.")
-            continue
-        except discord.HTTPException as e:
-            logger.error(f"HTTP error while fetching history in {guild.name}: {e}. Skipping this guild.")
-            continue
+async def push_dashboards(embed: discord.Embed, exclude: int = None):
+    """
+    Pushes the dashboard embed to every configured guild concurrently.
+    exclude: Optional guild ID that was already updated (e.g. via a button click).
+    """
+    signature = embed_signature(embed)
+    started = STATE.last_refresh  # Set when the refresh that built the embed started
+    guild_ids = [guild_id for guild_id in GUILD_MAPPING if guild_id != exclude]
+    results = await asyncio.gather(
+        *(_update_guild(guild_id, embed, signature, started) for guild_id in guild_ids),
+        return_exceptions=True,
+    )
+    for guild_id, result in zip(guild_ids, results):
+        if isinstance(result, Exception):
+            logger.error(f"Unexpected error updating dashboard in guild {guild_id}: {result!r}")
 
 
 # -----------------------------
@@ -521,7 +979,7 @@ async def setup(interaction: discord.Interaction):
         return
 
     # Select View
-    view = ControlView() if mode == "CONTROL" else ReadOnlyView()
+    view = GUILD_VIEWS[guild_id]
 
     embed = discord.Embed(
         title="🏢 IEEE Office Presence",
@@ -531,12 +989,18 @@ async def setup(interaction: discord.Interaction):
 
     await interaction.response.send_message(embed=embed, view=view)
 
+    # Remember the new dashboard so refreshes edit it directly
+    message = await interaction.original_response()
+    DASHBOARD_MESSAGES[guild_id] = message.id
+    save_dashboard_messages()
+    PUSHED_DASHBOARDS.pop(guild_id, None)  # The new message still shows "Initializing..."
+
     # Immediately do a refresh to sync data and format
     await global_refresh()
 
 
 @bot.tree.command(name="add_member", description="Add a member to the backend")
-@app_commands.guilds(discord.Object(id=EXEC_GUILD_ID))
+@app_commands.guilds(EXEC_GUILD_OBJ)
 async def add_member(
     interaction: discord.Interaction, member: discord.Member, uid: str, name: str = None
 ):
@@ -548,18 +1012,16 @@ async def add_member(
     """
     name_to_use = name if name else member.display_name
     try:
-        response = requests.post(
+        async with http_session.post(
             ENDPOINTS["members"],
             json={
                 "name": name_to_use,
                 "uid": uid,
                 "discord_id": str(member.id),
             },
-            headers=REQUEST_HEADERS,
-            timeout=5,
-        )
-        response.raise_for_status()
-    except requests.RequestException as e:
+        ) as response:
+            response.raise_for_status()
+    except HTTP_ERRORS as e:
         logger.error(f"Error adding member {member.id}: {e}")
         await interaction.response.send_message(
             f"❌ Failed to add member: {e}", ephemeral=True
@@ -573,7 +1035,7 @@ async def add_member(
 
 @bot.tree.command(name="update_member", description="[Admin] Update a member's information")
 @app_commands.checks.has_permissions(administrator=True)
-@app_commands.guilds(discord.Object(id=EXEC_GUILD_ID))
+@app_commands.guilds(EXEC_GUILD_OBJ)
 async def update_member(
     interaction: discord.Interaction,
     member_id: int,
@@ -605,14 +1067,12 @@ async def update_member(
         update_data["discord_id"] = discord_id
 
     try:
-        response = requests.put(
+        async with http_session.put(
             f"{ENDPOINTS['members']}/{member_id}",
             json=update_data,
-            headers=REQUEST_HEADERS,
-            timeout=5,
-        )
-        response.raise_for_status()
-    except requests.RequestException as e:
+        ) as response:
+            response.raise_for_status()
+    except HTTP_ERRORS as e:
         logger.error(f"Error updating member {member_id}: {e}")
         await interaction.response.send_message(
             f"❌ Failed to update member: {e}", ephemeral=True
@@ -628,20 +1088,18 @@ async def update_member(
 
 @bot.tree.command(name="delete_member", description="[Admin] Delete a member from the backend")
 @app_commands.checks.has_permissions(administrator=True)
-@app_commands.guilds(discord.Object(id=EXEC_GUILD_ID))
+@app_commands.guilds(EXEC_GUILD_OBJ)
 async def delete_member(interaction: discord.Interaction, member_id: int):
     """
     Deletes a member from the backend system by their member ID.
     1. member_id: The backend member ID to delete.
     """
     try:
-        response = requests.delete(
-            f"{ENDPOINTS['members']}/{member_id}",
-            headers=REQUEST_HEADERS,
-            timeout=5,
-        )
-        response.raise_for_status()
-    except requests.RequestException as e:
+        async with http_session.delete(
+            f"{ENDPOINTS['members']}/{member_id}"
+        ) as response:
+            response.raise_for_status()
+    except HTTP_ERRORS as e:
         logger.error(f"Error deleting member {member_id}: {e}")
         await interaction.response.send_message(
             f"❌ Failed to delete member: {e}", ephemeral=True
@@ -654,18 +1112,16 @@ async def delete_member(interaction: discord.Interaction, member_id: int):
 
 
 @bot.tree.command(name="members", description="List all members in the backend")
-@app_commands.guilds(discord.Object(id=EXEC_GUILD_ID))
+@app_commands.guilds(EXEC_GUILD_OBJ)
 async def members(interaction: discord.Interaction):
     """
     Lists all members currently registered in the backend system.
     """
     try:
-        response = requests.get(
-            ENDPOINTS["members"], headers=REQUEST_HEADERS, timeout=5
-        )
-        response.raise_for_status()
-        data = response.json()
-    except requests.RequestException as e:
+        async with http_session.get(ENDPOINTS["members"]) as response:
+            response.raise_for_status()
+            data = orjson.loads(await response.read())
+    except BACKEND_ERRORS as e:
         logger.error(f"Error fetching members: {e}")
         await interaction.response.send_message(
             f"❌ Failed to fetch members: {e}", ephemeral=True
@@ -707,19 +1163,17 @@ async def members(interaction: discord.Interaction):
 
 
 @bot.tree.command(name="scan_history", description="List last 10 scan events")
-@app_commands.guilds(discord.Object(id=EXEC_GUILD_ID))
+@app_commands.guilds(EXEC_GUILD_OBJ)
 async def scan_history(interaction: discord.Interaction):
     """
     Lists the last 10 scan events from the backend system.
     Shows member names if UIDs are registered.
     """
     try:
-        response = requests.get(
-            ENDPOINTS["scan_history"], headers=REQUEST_HEADERS, timeout=5
-        )
-        response.raise_for_status()
-        data = response.json()
-    except requests.RequestException as e:
+        async with http_session.get(ENDPOINTS["scan_history"]) as response:
+            response.raise_for_status()
+            data = orjson.loads(await response.read())
+    except BACKEND_ERRORS as e:
         logger.error(f"Error fetching scan history: {e}")
         await interaction.response.send_message(
             f"❌ Failed to fetch scan history: {e}", ephemeral=True
@@ -735,22 +1189,21 @@ async def scan_history(interaction: discord.Interaction):
     # Fetch members to map UIDs to names
     uid_to_name = {}
     try:
-        members_response = requests.get(
-            ENDPOINTS["members"], headers=REQUEST_HEADERS, timeout=5
-        )
-        members_response.raise_for_status()
-        members_data = members_response.json()
+        async with http_session.get(ENDPOINTS["members"]) as members_response:
+            members_response.raise_for_status()
+            members_data = orjson.loads(await members_response.read())
         
         # Create UID -> Name mapping
         for member in members_data:
             uid_to_name[member.get("uid")] = member.get("name")
-    except requests.RequestException as e:
+    except BACKEND_ERRORS as e:
         logger.warning(f"Could not fetch members for scan history: {e}")
         # Continue without member names
 
     # Build a more readable, robust list for the scan history
     # Note: Backend returns ScanEvent with only 'uid' and 'time' fields
     history_lines = []
+    parse_iso = datetime.fromisoformat  # Bound once for the loop
     for entry in data:
         uid = entry.get("uid", "Unknown UID")
         raw_time = entry.get("time")
@@ -758,7 +1211,7 @@ async def scan_history(interaction: discord.Interaction):
         # Try to parse ISO timestamps to a friendly format, fall back to raw string
         time_str = raw_time or "Unknown time"
         try:
-            time_obj = datetime.fromisoformat(raw_time)
+            time_obj = parse_iso(raw_time)
             time_str = time_obj.strftime("%Y-%m-%d %H:%M:%S")
         except Exception:
             # keep raw_time if parsing fails
@@ -782,7 +1235,7 @@ async def scan_history(interaction: discord.Interaction):
 
 
 @bot.tree.command(name="visits", description="View office visits with optional filters")
-@app_commands.guilds(discord.Object(id=EXEC_GUILD_ID))
+@app_commands.guilds(EXEC_GUILD_OBJ)
 async def visits(
     interaction: discord.Interaction,
     member: discord.Member = None,
@@ -808,11 +1261,9 @@ async def visits(
     if member:
         try:
             # Fetch all members from the backend
-            members_response = requests.get(
-                ENDPOINTS["members"], headers=REQUEST_HEADERS, timeout=5
-            )
-            members_response.raise_for_status()
-            members_data = members_response.json()
+            async with http_session.get(ENDPOINTS["members"]) as members_response:
+                members_response.raise_for_status()
+                members_data = orjson.loads(await members_response.read())
             
             # Find the member by Discord ID
             member_id = None
@@ -831,7 +1282,7 @@ async def visits(
             # Add member_id to query parameters
             params["member_id"] = member_id
             
-        except requests.RequestException as e:
+        except BACKEND_ERRORS as e:
             logger.error(f"Error fetching members: {e}")
             await interaction.response.send_message(
                 f"❌ Failed to fetch member data: {e}", ephemeral=True
@@ -841,8 +1292,7 @@ async def visits(
     if from_date:
         # Convert YYYY-MM-DD to RFC3339 format
         try:
-            from_dt = datetime.strptime(from_date, "%Y-%m-%d")
-            params["from"] = from_dt.strftime("%Y-%m-%dT00:00:00Z")
+            params["from"] = day_to_rfc3339(from_date, "T00:00:00Z")
         except ValueError:
             await interaction.response.send_message(
                 "❌ Invalid from_date format. Use YYYY-MM-DD (e.g., 2024-01-15).",
@@ -853,8 +1303,7 @@ async def visits(
     if to_date:
         # Convert YYYY-MM-DD to RFC3339 format
         try:
-            to_dt = datetime.strptime(to_date, "%Y-%m-%d")
-            params["to"] = to_dt.strftime("%Y-%m-%dT23:59:59Z")
+            params["to"] = day_to_rfc3339(to_date, "T23:59:59Z")
         except ValueError:
             await interaction.response.send_message(
                 "❌ Invalid to_date format. Use YYYY-MM-DD (e.g., 2024-01-31).",
@@ -863,12 +1312,12 @@ async def visits(
             return
 
     try:
-        response = requests.get(
-            ENDPOINTS["visits"], params=params, headers=REQUEST_HEADERS, timeout=10
-        )
-        response.raise_for_status()
-        data = response.json()
-    except requests.RequestException as e:
+        async with http_session.get(
+            ENDPOINTS["visits"], params=params, timeout=LONG_REQUEST_TIMEOUT
+        ) as response:
+            response.raise_for_status()
+            data = orjson.loads(await response.read())
+    except BACKEND_ERRORS as e:
         logger.error(f"Error fetching visits: {e}")
         await interaction.response.send_message(
             f"❌ Failed to fetch visits: {e}", ephemeral=True
@@ -881,32 +1330,6 @@ async def visits(
         )
         return
 
-    # Format visit data
-    def format_visit(visit):
-        name = visit.get("name", "Unknown")
-        signin = visit.get("signin_time", "")
-        signout = visit.get("signout_time", "")
-
-        try:
-            signin_dt = datetime.fromisoformat(signin)
-            signout_dt = datetime.fromisoformat(signout)
-            duration = signout_dt - signin_dt
-            hours = duration.total_seconds() / 3600
-
-            date_str = signin_dt.strftime("%Y-%m-%d")
-            signin_time = signin_dt.strftime("%H:%M")
-            signout_time = signout_dt.strftime("%H:%M")
-
-            if hours >= 1:
-                duration_str = f"{hours:.1f}h"
-            else:
-                minutes = duration.total_seconds() / 60
-                duration_str = f"{minutes:.0f}m"
-
-            return f"• **{name}** — {date_str} {signin_time}-{signout_time} ({duration_str})"
-        except Exception:
-            return f"• **{name}** — {signin} to {signout}"
-    
     # Create paginated embeds (20 visits per page)
     pages = create_pages(
         items=data,
@@ -942,7 +1365,7 @@ async def visits(
 @bot.tree.command(
     name="delete_visits", description="[Admin] Delete visits within a date range"
 )
-@app_commands.guilds(discord.Object(id=EXEC_GUILD_ID))
+@app_commands.guilds(EXEC_GUILD_OBJ)
 @app_commands.checks.has_permissions(administrator=True)
 async def delete_visits(
     interaction: discord.Interaction, from_date: str = None, to_date: str = None
@@ -963,8 +1386,7 @@ async def delete_visits(
     params = {}
     if from_date:
         try:
-            from_dt = datetime.strptime(from_date, "%Y-%m-%d")
-            params["from"] = from_dt.strftime("%Y-%m-%dT00:00:00Z")
+            params["from"] = day_to_rfc3339(from_date, "T00:00:00Z")
         except ValueError:
             await interaction.response.send_message(
                 "❌ Invalid from_date format. Use YYYY-MM-DD (e.g., 2024-01-15).",
@@ -974,8 +1396,7 @@ async def delete_visits(
 
     if to_date:
         try:
-            to_dt = datetime.strptime(to_date, "%Y-%m-%d")
-            params["to"] = to_dt.strftime("%Y-%m-%dT23:59:59Z")
+            params["to"] = day_to_rfc3339(to_date, "T23:59:59Z")
         except ValueError:
             await interaction.response.send_message(
                 "❌ Invalid to_date format. Use YYYY-MM-DD (e.g., 2024-01-31).",
@@ -984,13 +1405,13 @@ async def delete_visits(
             return
 
     try:
-        response = requests.delete(
-            ENDPOINTS["visits"], params=params, headers=REQUEST_HEADERS, timeout=10
-        )
-        response.raise_for_status()
-        result = response.json()
+        async with http_session.delete(
+            ENDPOINTS["visits"], params=params, timeout=LONG_REQUEST_TIMEOUT
+        ) as response:
+            response.raise_for_status()
+            result = orjson.loads(await response.read())
         deleted_count = result.get("deleted", 0)
-    except requests.RequestException as e:
+    except BACKEND_ERRORS as e:
         logger.error(f"Error deleting visits: {e}")
         await interaction.response.send_message(
             f"❌ Failed to delete visits: {e}", ephemeral=True
@@ -1005,54 +1426,41 @@ async def delete_visits(
 @bot.tree.command(
     name="signout_all", description="Sign out all members from the office"
 )
-@app_commands.guilds(discord.Object(id=EXEC_GUILD_ID))
+@app_commands.guilds(EXEC_GUILD_OBJ)
 async def signout_all(interaction: discord.Interaction):
     """
     Signs out all members currently signed in to the office.
     """
-    try:
-        response = requests.post(
-            ENDPOINTS["signout_all"], headers=REQUEST_HEADERS, timeout=5
-        )
-        response.raise_for_status()
-    except requests.RequestException as e:
-        logger.error(f"Error signing out all members: {e}")
-        await interaction.response.send_message(
-            f"❌ Failed to sign out all members: {e}", ephemeral=True
-        )
+    # Defer first so a slow backend can't outlast the 3s interaction window
+    await interaction.response.defer(ephemeral=True)
+    if not await backend_post(interaction, "signout_all", "sign out all members"):
         return
 
-    await interaction.response.send_message(
+    invalidate_leaderboard_cache()  # Every sign-out completed a visit
+    invalidate_attendees_cache()
+
+    await interaction.followup.send(
         "✅ All members have been signed out from the office.", ephemeral=True
     )
 
-    # Update EVERY server
-    await global_refresh()
+    # Update EVERY server (no one is left, so skip fetching /current)
+    await global_refresh(attendees_override=[])
 
 
 @bot.tree.command(name="signin", description="[Admin] Sign in a member to the office")
 @app_commands.checks.has_permissions(administrator=True)
-@app_commands.guilds(discord.Object(id=EXEC_GUILD_ID))
+@app_commands.guilds(EXEC_GUILD_OBJ)
 async def signin(interaction: discord.Interaction, member: discord.Member):
     """
     Signs in a member to the office using their Discord ID.
     """
-    try:
-        response = requests.post(
-            ENDPOINTS["signin_discord"],
-            json={"discord_id": str(member.id)},
-            headers=REQUEST_HEADERS,
-            timeout=5,
-        )
-        response.raise_for_status()
-    except requests.RequestException as e:
-        logger.error(f"Error signing in member {member.id}: {e}")
-        await interaction.response.send_message(
-            f"❌ Failed to sign in member: {e}", ephemeral=True
-        )
+    await interaction.response.defer(ephemeral=True)
+    if not await backend_post(interaction, "signin_discord", "sign in member", {"discord_id": str(member.id)}):
         return
 
-    await interaction.response.send_message(
+    invalidate_attendees_cache()
+
+    await interaction.followup.send(
         f"✅ {member.mention} has been signed in to the office.", ephemeral=True
     )
 
@@ -1061,27 +1469,19 @@ async def signin(interaction: discord.Interaction, member: discord.Member):
 
 
 @bot.tree.command(name="signout", description="Sign out a member from the office")
-@app_commands.guilds(discord.Object(id=EXEC_GUILD_ID))
+@app_commands.guilds(EXEC_GUILD_OBJ)
 async def signout(interaction: discord.Interaction, member: discord.Member):
     """
     Signs out a member from the office using their Discord ID.
     """
-    try:
-        response = requests.post(
-            ENDPOINTS["signout_discord"],
-            json={"discord_id": str(member.id)},
-            headers=REQUEST_HEADERS,
-            timeout=5,
-        )
-        response.raise_for_status()
-    except requests.RequestException as e:
-        logger.error(f"Error signing out member {member.id}: {e}")
-        await interaction.response.send_message(
-            f"❌ Failed to sign out member: {e}", ephemeral=True
-        )
+    await interaction.response.defer(ephemeral=True)
+    if not await backend_post(interaction, "signout_discord", "sign out member", {"discord_id": str(member.id)}):
         return
 
-    await interaction.response.send_message(
+    invalidate_leaderboard_cache()  # The sign-out completed a visit
+    invalidate_attendees_cache()
+
+    await interaction.followup.send(
         f"✅ {member.mention} has been signed out from the office.", ephemeral=True
     )
 
@@ -1089,8 +1489,19 @@ async def signout(interaction: discord.Interaction, member: discord.Member):
     await global_refresh()
 
 
+# /leaderboard period -> days looked back, and its title name
+LEADERBOARD_PERIOD_DAYS = {
+    "week": 7,
+    "month": 30,
+    "semester": 120,
+    "all": 3650  # ~10 years, effectively all time
+}
+LEADERBOARD_PERIOD_NAMES = {"week": "Week", "month": "Month", "semester": "Semester", "all": "All Time"}
+LEADERBOARD_MAX_TOP = 25  # Most members /leaderboard will show
+
+
 @bot.tree.command(name="leaderboard", description="View office attendance leaderboard")
-@app_commands.guilds(discord.Object(id=EXEC_GUILD_ID))
+@app_commands.guilds(EXEC_GUILD_OBJ)
 async def leaderboard(
     interaction: discord.Interaction,
     period: str = "week",
@@ -1103,29 +1514,21 @@ async def leaderboard(
     2. top: Number of top members to show (default 10, max 25)
     3. public: If true, shows leaderboard to everyone in the channel (default: false, only you can see it)
     """
-    # Map period to days
-    period_map = {
-        "week": 7,
-        "month": 30,
-        "semester": 120,
-        "all": 3650  # ~10 years, effectively all time
-    }
-    
     period_lower = period.lower()
-    if period_lower not in period_map:
+    days = LEADERBOARD_PERIOD_DAYS.get(period_lower)
+    if days is None:
         await interaction.response.send_message(
             f"❌ Invalid period. Choose from: week, month, semester, all",
             ephemeral=True
         )
         return
     
-    days = period_map[period_lower]
-    top = max(1, min(top, 25))  # Clamp between 1 and 25
+    top = max(1, min(top, LEADERBOARD_MAX_TOP))
     
     # Defer response as this might take a moment
     await interaction.response.defer(ephemeral=not public)
     
-    leaderboard_data, error = calculate_leaderboard(days=days, top_n=top)
+    leaderboard_data, error = await calculate_leaderboard(days=days, top_n=top)
     
     if error:
         await interaction.followup.send(f"❌ {error}", ephemeral=True)
@@ -1139,7 +1542,7 @@ async def leaderboard(
         return
     
     # Build leaderboard embed using shared function
-    period_name = period_lower.capitalize() if period_lower != "all" else "All Time"
+    period_name = LEADERBOARD_PERIOD_NAMES[period_lower]
     embed = build_leaderboard_embed(
         leaderboard_data=leaderboard_data,
         title=f"🏆 Office Leaderboard — {period_name}",
@@ -1185,7 +1588,7 @@ async def help_command(interaction: discord.Interaction):
     
     # Available Commands
     guild_id = interaction.guild_id
-    is_exec_server = EXEC_GUILD_ID and guild_id == int(EXEC_GUILD_ID)
+    is_exec_server = EXEC_GUILD_ID and guild_id == EXEC_GUILD_OBJ.id
     
     if is_exec_server:
         embed.add_field(
@@ -1259,7 +1662,7 @@ async def help_command(interaction: discord.Interaction):
 
 
 @bot.tree.command(name="weekly_reports", description="[Admin] Enable or disable the weekly report task")
-@app_commands.guilds(discord.Object(id=EXEC_GUILD_ID))
+@app_commands.guilds(EXEC_GUILD_OBJ)
 @app_commands.checks.has_permissions(administrator=True)
 async def weekly_reports_toggle(interaction: discord.Interaction, enabled: bool):
     """
@@ -1297,43 +1700,73 @@ async def weekly_reports_toggle(interaction: discord.Interaction, enabled: bool)
 # -----------------------------
 # Background Tasks
 # -----------------------------
-@tasks.loop(hours=168)  # Run every week (168 hours)
+async def build_weekly_report_embed():
+    """
+    Builds the weekly report embed from the last 7 days' top 5.
+    Returns tuple: (embed, error_message); embed is None if there's no data.
+    """
+    leaderboard_data, error = await calculate_leaderboard(days=7, top_n=5)
+    if error or not leaderboard_data:
+        return None, error
+    
+    # Build report embed using shared function
+    embed = build_leaderboard_embed(
+        leaderboard_data=leaderboard_data,
+        title="📊 Weekly Office Report",
+        footer_text="Keep up the great work! 🎉 • Excluding auto-signouts at 4 AM",
+        description_prefix="Here are the top office attendees from last week:\n\n",
+        color=0x3498DB,  # Blue for weekly report
+    )
+    return embed, None
+
+
+# Wakes daily at both times; only Sundays prepare and post
+@tasks.loop(time=[WEEKLY_REPORT_PREPARE_TIME, WEEKLY_REPORT_TIME])
 async def weekly_report_task():
     """
     Posts weekly attendance report to configured channel.
-    Runs every Sunday at the time the bot was started.
+    Runs every Sunday at WEEKLY_REPORT_TIME (office time), regardless of
+    when the bot was started. The report is built at WEEKLY_REPORT_PREPARE_TIME
+    so posting only has to send it.
     """
+    global _WEEKLY_REPORT_CACHE, _weekly_report_channel
+    now = datetime.now(OFFICE_TZ)
+    if now.weekday() != 6:
+        return  # Not Sunday
+
     if not WEEKLY_REPORT_CHANNEL_ID:
         return  # Report channel not configured
     
     try:
-        channel = bot.get_channel(int(WEEKLY_REPORT_CHANNEL_ID))
+        if (now.hour, now.minute) < (WEEKLY_REPORT_TIME.hour, WEEKLY_REPORT_TIME.minute):
+            embed, error = await build_weekly_report_embed()
+            if error:
+                logger.warning(f"Failed to prepare weekly report, retrying at post time: {error}")
+            else:
+                _WEEKLY_REPORT_CACHE = (time.monotonic(), embed)
+            return
+        
+        if _weekly_report_channel is None:
+            _weekly_report_channel = bot.get_channel(WEEKLY_REPORT_CHANNEL_ID)
+        channel = _weekly_report_channel
         if not channel:
             logger.error(f"Weekly report channel {WEEKLY_REPORT_CHANNEL_ID} not found")
             return
         
-        # Get top 5 for the week
-        leaderboard_data, error = calculate_leaderboard(days=7, top_n=5)
-        
-        if error:
-            logger.error(f"Failed to generate weekly report: {error}")
-            return
+        # Use the prepared report unless it's missing or left over from an earlier week
+        cached, _WEEKLY_REPORT_CACHE = _WEEKLY_REPORT_CACHE, None
+        if cached and time.monotonic() - cached[0] < 3600:
+            embed = cached[1]
+        else:
+            embed, error = await build_weekly_report_embed()
+            if error:
+                logger.error(f"Failed to generate weekly report: {error}")
+                return
         
-        if not leaderboard_data:
+        if embed is None:
             # No data for the week, skip report
             return
         
-        # Build report embed using shared function
-        embed = build_leaderboard_embed(
-            leaderboard_data=leaderboard_data,
-            title="📊 Weekly Office Report",
-            footer_text="Keep up the great work! 🎉 • Excluding auto-signouts at 4 AM"
-        )
-        
-        # Add introductory text and adjust color
-        embed.description = "Here are the top office attendees from last week:\n\n" + embed.description
-        embed.color = 0x3498DB  # Blue for weekly report
-        
         await channel.send(embed=embed)
         logger.info(f"Weekly report posted to channel {WEEKLY_REPORT_CHANNEL_ID}")
         
@@ -1341,25 +1774,33 @@ async def weekly_report_task():
         logger.error(f"Error posting weekly report: {e}")
 
 
-@tasks.loop(minutes=1)
+def auto_refresh_interval(now: datetime) -> int:
+    """
+    Returns the auto-refresh period in seconds for the given local time.
+    Never shorter than REFRESH_COOLDOWN, which would make some runs no-ops.
+    """
+    # Off-hours: 11 PM - 7 AM (slower refresh rate)
+    if now.hour < 7 or now.hour >= 23:
+        return max(OFF_HOURS_REFRESH_INTERVAL, REFRESH_COOLDOWN)
+    return max(AUTO_REFRESH_INTERVAL, REFRESH_COOLDOWN)
+
+
+@tasks.loop(seconds=max(AUTO_REFRESH_INTERVAL, REFRESH_COOLDOWN))
 async def auto_refresh_task():
     """
     Automatically refreshes the dashboard every 1 minute during business hours,
     and every 5 minutes during off-hours (11 PM - 7 AM).
     """
     now = datetime.now()
-    hour = now.hour
-    
-    # Off-hours: 11 PM - 7 AM (slower refresh rate)
-    if hour < 7 or hour >= 23:
-        # Only refresh every 5 minutes during off-hours
-        if now.minute % 5 != 0:
-            return
-    
-    if LAST_REFRESH_TIME is not None:
-        elapsed = (now - LAST_REFRESH_TIME).total_seconds()
-        if elapsed < REFRESH_COOLDOWN:
-            return  # Skip refresh if within cooldown
+
+    # Adjust the loop period so off-hours don't wake the bot every minute
+    interval = auto_refresh_interval(now)
+    if auto_refresh_task.seconds != interval:
+        auto_refresh_task.change_interval(seconds=interval)
+        logger.info(f"Auto-refresh interval set to {interval} seconds.")
+
+    if STATE.last_refresh is not None and time.monotonic() - STATE.last_refresh < REFRESH_COOLDOWN:
+        return  # A manual refresh just ran, so this one would show nothing new
     logger.info("Running scheduled auto-refresh...")
     try:
         await global_refresh()
@@ -1375,45 +1816,153 @@ async def before_auto_refresh():
     await bot.wait_until_ready()
 
 
+# -----------------------------
+# Channel Cache Invalidation
+# -----------------------------
+@bot.event
+async def on_guild_channel_create(channel: discord.abc.GuildChannel):
+    # The guild may have had no tracker channel cached until now
+    if channel.name == OFFICE_TRACKER_CHANNEL_NAME:
+        CHANNEL_CACHE.pop(channel.guild.id, None)
+
+
+@bot.event
+async def on_guild_channel_delete(channel: discord.abc.GuildChannel):
+    global _weekly_report_channel
+    if channel.id == WEEKLY_REPORT_CHANNEL_ID:
+        _weekly_report_channel = None
+    if CHANNEL_CACHE.get(channel.guild.id) == channel:
+        del CHANNEL_CACHE[channel.guild.id]
+
+
+@bot.event
+async def on_guild_channel_update(before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+    # A rename can move the tracker to (or away from) this channel, so look it up again
+    if before.name != after.name:
+        CHANNEL_CACHE.pop(after.guild.id, None)
+
+
 # -----------------------------
 # Startup
 # -----------------------------
+def command_tree_hash(guild: discord.abc.Snowflake = None) -> str:
+    """
+    Returns a stable hash of the slash command definitions for a scope
+    (global when guild is None), used to skip syncing unchanged commands.
+    """
+    payload = [command.to_dict(bot.tree) for command in bot.tree.get_commands(guild=guild)]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+async def sync_command_scope(synced_hashes: dict[str, str], key: str, guild: discord.abc.Snowflake | None, label: str):
+    """
+    Syncs one command scope if its hash differs from synced_hashes[key],
+    recording the new hash on success.
+    """
+    scope_hash = command_tree_hash(guild=guild)
+    if synced_hashes.get(key) == scope_hash:
+        logger.info(f"{label} commands unchanged, skipping sync.")
+        return
+    try:
+        await bot.tree.sync(guild=guild)
+        synced_hashes[key] = scope_hash
+        logger.info(f"{label} commands synced.")
+    except discord.HTTPException as e:
+        logger.error(f"Failed to sync {label} commands: {e}")
+
+
+def load_command_hashes() -> dict[str, str]:
+    """Loads the command tree hashes recorded at the last successful sync."""
+    try:
+        with open(COMMANDS_HASH_FILE) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not load command hashes, commands will be synced: {e}")
+        return {}
+
+
+def save_command_hashes(hashes: dict[str, str]):
+    try:
+        with open(COMMANDS_HASH_FILE, "w") as f:
+            json.dump(hashes, f)
+    except OSError as e:
+        logger.error(f"Could not save command hashes: {e}")
+
+
 @bot.event
-async def on_ready():
+async def setup_hook():
+    global CONTROL_VIEW, READONLY_VIEW
+    CONTROL_VIEW = ControlView()
+    READONLY_VIEW = ReadOnlyView()
+    GUILD_VIEWS.update(
+        {guild_id: CONTROL_VIEW if mode == "CONTROL" else READONLY_VIEW for guild_id, mode in GUILD_MAPPING.items()}
+    )
+
     # Important: Register BOTH views so the buttons work after restart
-    bot.add_view(ReadOnlyView())
-    bot.add_view(ControlView())
+    bot.add_view(READONLY_VIEW)
+    bot.add_view(CONTROL_VIEW)
+
 
+@bot.event
+async def on_ready():
+    global _weekly_report_channel
     logger.info(f"Logged in as {bot.user}")
 
-    # Sync GLOBAL commands (like /setup)
-    await bot.tree.sync()
-    logger.info("Global commands synced.")
+    # Only sync scopes whose command definitions changed since the last sync,
+    # since syncing counts against Discord's daily command rate limit
+    # (delete the COMMANDS_HASH_FILE to force a sync)
+    synced_hashes = load_command_hashes()
 
-    # Sync EXEC SERVER commands (like /add_member)
+    # GLOBAL commands (like /setup) and EXEC SERVER commands (like /add_member)
+    scopes = [("global", None, "Global")]
     if EXEC_GUILD_ID:
-        exec_guild_obj = discord.Object(id=int(EXEC_GUILD_ID))
-        try:
-            await bot.tree.sync(guild=exec_guild_obj)
-            logger.info(f"Exec Guild ({EXEC_GUILD_ID}) commands synced.")
-        except discord.HTTPException as e:
-            logger.error(f"Failed to sync Exec guild commands: {e}")
+        scopes.append((f"guild:{EXEC_GUILD_ID}", EXEC_GUILD_OBJ, f"Exec Guild ({EXEC_GUILD_ID})"))
     else:
         logger.info("EXEC_GUILD_ID not configured, skipping exec guild command sync.")
 
+    # The scopes are independent, so sync them concurrently
+    await asyncio.gather(*(sync_command_scope(synced_hashes, *scope) for scope in scopes))
+
+    save_command_hashes(synced_hashes)
+
+    # Resolve the tracker channels up front (a reconnect replaces the channel
+    # objects, so drop any cached from the previous session)
+    _weekly_report_channel = None
+    CHANNEL_CACHE.clear()
+    for guild_id in GUILD_MAPPING:
+        guild = bot.get_guild(guild_id)
+        if guild:
+            get_tracker_channel(guild)
+
     # Start the auto-refresh background task
     if not auto_refresh_task.is_running():
         auto_refresh_task.start()
-        logger.info("Auto-refresh task started (every 1 minutes).")
+        logger.info(f"Auto-refresh task started (every {AUTO_REFRESH_INTERVAL} seconds).")
     
     # Start the weekly report background task if enabled
     if WEEKLY_REPORT_ENABLED:
         if WEEKLY_REPORT_CHANNEL_ID and not weekly_report_task.is_running():
             weekly_report_task.start()
-            logger.info(f"Weekly report task started (every 7 days).")
+            logger.info(f"Weekly report task started (Sundays at {WEEKLY_REPORT_TIME:%H:%M}).")
     else:
         logger.info("Weekly report task disabled by WEEKLY_REPORT_ENABLED=false.")
 
 
+async def main():
+    global http_session
+    # One pooled session for the bot's lifetime; closed automatically on shutdown
+    async with aiohttp.ClientSession(
+        headers=REQUEST_HEADERS,
+        timeout=REQUEST_TIMEOUT,
+        connector=aiohttp.TCPConnector(
+            limit=20, keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT
+        ),
+    ) as http_session:
+        async with bot:
+            await bot.start(TOKEN)
+
+
 if __name__ == "__main__":
-    bot.run(TOKEN)
+    asyncio.run(main())
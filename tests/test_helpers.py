@@ -1,7 +1,8 @@
 """Unit tests for helper functions."""
 import pytest
+import asyncio
 from datetime import datetime, timedelta
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 import sys
 import os
 
@@ -13,20 +14,58 @@ os.environ.setdefault("EXEC_GUILD_ID", "123456789")
 os.environ.setdefault("COMMUNITY_GUILD_ID", "987654321")
 os.environ.setdefault("DISCORD_TOKEN", "test_token")
 
-from main import calculate_leaderboard
+import aiohttp
+import discord
+import orjson
+
+import main
+from main import (
+    calculate_leaderboard,
+    invalidate_leaderboard_cache,
+    global_refresh,
+    embed_signature,
+    format_visit,
+    build_leaderboard_embed,
+    build_weekly_report_embed,
+    day_to_rfc3339,
+    visit_hours,
+    backend_post,
+    PaginatedView,
+    create_pages,
+    get_current_office_attendees,
+    invalidate_attendees_cache,
+    auto_refresh_interval,
+    AUTO_REFRESH_INTERVAL,
+    LEADERBOARD_CACHE_TTL,
+    OFF_HOURS_REFRESH_INTERVAL,
+)
+
+
+def mock_json_response(mock_session, data, method="get"):
+    """Make `async with mock_session.<method>(...)` yield a response whose body is `data` as JSON."""
+    mock_response = MagicMock()
+    mock_response.read = AsyncMock(return_value=orjson.dumps(data))
+    getattr(mock_session, method).return_value.__aenter__.return_value = mock_response
+    return mock_response
+
+
+@pytest.fixture(autouse=True)
+def clear_leaderboard_cache():
+    """Keep cached leaderboards from leaking between tests."""
+    invalidate_leaderboard_cache()
+    yield
+    invalidate_leaderboard_cache()
 
 
 class TestCalculateLeaderboard:
     """Test leaderboard calculation"""
 
-    @patch("main.requests.get")
-    def test_calculate_leaderboard_basic(self, mock_get, mock_visits_response):
+    @patch("main.http_session")
+    async def test_calculate_leaderboard_basic(self, mock_session, mock_visits_response):
         """Test basic leaderboard calculation."""
-        mock_response = MagicMock()
-        mock_response.json.return_value = mock_visits_response
-        mock_get.return_value = mock_response
+        mock_json_response(mock_session, mock_visits_response)
 
-        leaderboard, error = calculate_leaderboard(days=7, top_n=10)
+        leaderboard, error = await calculate_leaderboard(days=7, top_n=10)
 
         assert error is None
         assert len(leaderboard) > 0
@@ -34,8 +73,8 @@ class TestCalculateLeaderboard:
         assert "visits" in leaderboard[0]
         assert "total_hours" in leaderboard[0]
 
-    @patch("main.requests.get")
-    def test_calculate_leaderboard_filters_4am(self, mock_get):
+    @patch("main.http_session")
+    async def test_calculate_leaderboard_filters_4am(self, mock_session):
         """Test that 4 AM auto-signouts are filtered out."""
         # Create a visit with exact 4 AM signout time
         base_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
@@ -52,18 +91,38 @@ class TestCalculateLeaderboard:
             },
         ]
 
-        mock_response = MagicMock()
-        mock_response.json.return_value = visits
-        mock_get.return_value = mock_response
+        mock_json_response(mock_session, visits)
 
-        leaderboard, error = calculate_leaderboard(days=7, top_n=10)
+        leaderboard, error = await calculate_leaderboard(days=7, top_n=10)
 
         # Both should be present (4 AM filter checks exact hour, not close times)
         assert error is None
         assert len(leaderboard) >= 1
 
-    @patch("main.requests.get")
-    def test_calculate_leaderboard_sorting(self, mock_get):
+    @patch("main.http_session")
+    async def test_calculate_leaderboard_excludes_4am_signout(self, mock_session):
+        """Test that a visit signed out at exactly 04:00 is not counted."""
+        visits = [
+            {
+                "name": "Alice",
+                "signin_time": "2024-01-15T22:00:00",
+                "signout_time": "2024-01-16T04:00:00",
+            },
+            {
+                "name": "Bob",
+                "signin_time": "2024-01-16T03:00:00",
+                "signout_time": "2024-01-16T04:01:00",
+            },
+        ]
+        mock_json_response(mock_session, visits)
+
+        leaderboard, error = await calculate_leaderboard(days=7, top_n=10)
+
+        assert error is None
+        assert [member["name"] for member in leaderboard] == ["Bob"]
+
+    @patch("main.http_session")
+    async def test_calculate_leaderboard_sorting(self, mock_session):
         """Test leaderboard is sorted by visits then hours."""
         now = datetime.now()
         visits = [
@@ -84,11 +143,9 @@ class TestCalculateLeaderboard:
             },
         ]
 
-        mock_response = MagicMock()
-        mock_response.json.return_value = visits
-        mock_get.return_value = mock_response
+        mock_json_response(mock_session, visits)
 
-        leaderboard, error = calculate_leaderboard(days=7, top_n=10)
+        leaderboard, error = await calculate_leaderboard(days=7, top_n=10)
 
         # Alice should be first (2 visits vs Bob's 1)
         assert leaderboard[0]["name"] == "Alice"
@@ -96,8 +153,8 @@ class TestCalculateLeaderboard:
         assert leaderboard[1]["name"] == "Bob"
         assert leaderboard[1]["visits"] == 1
 
-    @patch("main.requests.get")
-    def test_calculate_leaderboard_top_n(self, mock_get):
+    @patch("main.http_session")
+    async def test_calculate_leaderboard_top_n(self, mock_session):
         """Test top_n parameter limits results."""
         now = datetime.now()
         visits = []
@@ -110,28 +167,24 @@ class TestCalculateLeaderboard:
                 }
             )
 
-        mock_response = MagicMock()
-        mock_response.json.return_value = visits
-        mock_get.return_value = mock_response
+        mock_json_response(mock_session, visits)
 
-        leaderboard, error = calculate_leaderboard(days=7, top_n=5)
+        leaderboard, error = await calculate_leaderboard(days=7, top_n=5)
 
         assert len(leaderboard) <= 5
 
-    @patch("main.requests.get")
-    def test_calculate_leaderboard_empty_response(self, mock_get):
+    @patch("main.http_session")
+    async def test_calculate_leaderboard_empty_response(self, mock_session):
         """Test handling empty visit data."""
-        mock_response = MagicMock()
-        mock_response.json.return_value = []
-        mock_get.return_value = mock_response
+        mock_json_response(mock_session, [])
 
-        leaderboard, error = calculate_leaderboard(days=7, top_n=10)
+        leaderboard, error = await calculate_leaderboard(days=7, top_n=10)
 
         assert error is None
         assert len(leaderboard) == 0
 
-    @patch("main.requests.get")
-    def test_calculate_leaderboard_visit_duration_calculation(self, mock_get):
+    @patch("main.http_session")
+    async def test_calculate_leaderboard_visit_duration_calculation(self, mock_session):
         """Test that visit durations are correctly calculated in hours."""
         now = datetime.now()
         visits = [
@@ -142,13 +195,604 @@ class TestCalculateLeaderboard:
             },
         ]
 
-        mock_response = MagicMock()
-        mock_response.json.return_value = visits
-        mock_get.return_value = mock_response
+        mock_json_response(mock_session, visits)
 
-        leaderboard, error = calculate_leaderboard(days=7, top_n=10)
+        leaderboard, error = await calculate_leaderboard(days=7, top_n=10)
 
         # Should have 1 visit with approximately 3 hours
         assert len(leaderboard) == 1
         assert leaderboard[0]["total_hours"] == pytest.approx(3.0, abs=0.1)
 
+
+class TestLeaderboardCache:
+    """Test leaderboard result caching"""
+
+    @patch("main.http_session")
+    async def test_repeat_call_uses_cache(self, mock_session, mock_visits_response):
+        """Test that a repeat call within the TTL doesn't refetch visits."""
+        mock_json_response(mock_session, mock_visits_response)
+
+        first, _ = await calculate_leaderboard(days=7, top_n=10)
+        second, _ = await calculate_leaderboard(days=7, top_n=10)
+
+        assert first == second
+        assert mock_session.get.call_count == 1
+
+    @patch("main.http_session")
+    async def test_force_and_invalidate_refetch(self, mock_session, mock_visits_response):
+        """Test that force=True and invalidation bypass the cache."""
+        mock_json_response(mock_session, mock_visits_response)
+
+        await calculate_leaderboard(days=7, top_n=10)
+        await calculate_leaderboard(days=7, top_n=10, force=True)
+        invalidate_leaderboard_cache()
+        await calculate_leaderboard(days=7, top_n=10)
+
+        assert mock_session.get.call_count == 3
+
+    @patch("main.http_session")
+    async def test_ttl_depends_on_window(self, mock_session, mock_visits_response):
+        """Test that longer windows stay cached past the default TTL."""
+        mock_json_response(mock_session, mock_visits_response)
+
+        with patch("main.time.monotonic", return_value=1000.0):
+            await calculate_leaderboard(days=7, top_n=10)
+            await calculate_leaderboard(days=120, top_n=10)
+        with patch("main.time.monotonic", return_value=1000.0 + LEADERBOARD_CACHE_TTL + 1):
+            await calculate_leaderboard(days=7, top_n=10)
+            await calculate_leaderboard(days=120, top_n=10)
+
+        assert mock_session.get.call_count == 3
+
+    @patch("main.http_session")
+    async def test_shorter_window_reuses_longer_fetch(self, mock_session):
+        """Test that a week leaderboard is derived from a cached month of visits."""
+        now = datetime.now()
+        visits = [
+            {
+                "name": "Alice",
+                "signin_time": (now - timedelta(days=20, hours=2)).isoformat(),
+                "signout_time": (now - timedelta(days=20, hours=1)).isoformat(),
+            },
+            {
+                "name": "Bob",
+                "signin_time": (now - timedelta(days=1, hours=2)).isoformat(),
+                "signout_time": (now - timedelta(days=1, hours=1)).isoformat(),
+            },
+        ]
+        mock_json_response(mock_session, visits)
+
+        month, _ = await calculate_leaderboard(days=30, top_n=10)
+        week, _ = await calculate_leaderboard(days=7, top_n=10)
+
+        assert {member["name"] for member in month} == {"Alice", "Bob"}
+        assert [member["name"] for member in week] == ["Bob"]
+        assert mock_session.get.call_count == 1
+
+    @patch("main.http_session")
+    @patch("main.VISITS_FETCH_LIMIT", 2)
+    async def test_truncated_fetch_is_not_reused(self, mock_session, mock_visits_response):
+        """Test that a fetch cut off at the limit only serves its own window."""
+        mock_json_response(mock_session, mock_visits_response)
+
+        await calculate_leaderboard(days=30, top_n=10)
+        await calculate_leaderboard(days=7, top_n=10)
+
+        assert mock_session.get.call_count == 2
+
+    @patch("main.http_session")
+    async def test_errors_are_not_cached(self, mock_session, mock_visits_response):
+        """Test that a failed fetch is retried on the next call."""
+        mock_session.get.side_effect = aiohttp.ClientError("backend down")
+        _, error = await calculate_leaderboard(days=7, top_n=10)
+        assert error is not None
+
+        mock_session.get.side_effect = None
+        mock_json_response(mock_session, mock_visits_response)
+        leaderboard, error = await calculate_leaderboard(days=7, top_n=10)
+
+        assert error is None
+        assert len(leaderboard) > 0
+
+    @pytest.mark.parametrize(
+        "attendees, is_success, invalidated",
+        [
+            ([], True, True),  # Alice signed out (e.g. at the RFID reader)
+            ([("Alice", "2024-01-15T09:00:00"), ("Bob", "2024-01-15T10:00:00")], True, False),
+            ([], False, False),  # Backend error, not a sign-out
+        ],
+    )
+    async def test_departure_seen_by_dashboard_invalidates(self, attendees, is_success, invalidated):
+        """Test that sign-outs made outside the bot still clear cached leaderboards."""
+        with patch.object(main.STATE, "attendees", [("Alice", "2024-01-15T09:00:00")]), \
+                patch.object(main.STATE, "status", {"ok": is_success, "error": "down"}), \
+                patch("main.get_current_office_attendees", new_callable=AsyncMock,
+                      return_value=(attendees, is_success)), \
+                patch("main.invalidate_leaderboard_cache") as mock_invalidate:
+            await main.build_dashboard_embed()
+
+        assert mock_invalidate.called == invalidated
+
+
+class TestGlobalRefresh:
+    """Test coalescing of concurrent dashboard refreshes"""
+
+    @patch("main.REFRESH_DEBOUNCE", 0.01)
+    async def test_concurrent_refreshes_are_coalesced(self):
+        """Test that a burst during a refresh runs only a single follow-up refresh."""
+        started = asyncio.Event()
+
+        async def slow_refresh(attendees_override=None):
+            started.set()
+            await asyncio.sleep(0.01)
+
+        with patch("main._refresh_dashboards", side_effect=slow_refresh) as mock_refresh:
+            first = asyncio.create_task(global_refresh())
+            await started.wait()
+            await asyncio.gather(*(global_refresh() for _ in range(5)))
+            await first
+
+        assert mock_refresh.call_count == 2
+
+    @patch("main.REFRESH_DEBOUNCE", 0.05)
+    async def test_requests_during_debounce_join_follow_up(self):
+        """Test that requests made while the follow-up waits don't add refreshes."""
+        calls = []
+        release = asyncio.Event()
+
+        async def record_refresh(attendees_override=None):
+            calls.append(asyncio.get_running_loop().time())
+            if len(calls) == 1:
+                await release.wait()
+
+        with patch("main._refresh_dashboards", side_effect=record_refresh):
+            first = asyncio.create_task(global_refresh())
+            await asyncio.sleep(0)  # Let the first refresh start
+            late = [asyncio.create_task(global_refresh())]
+            await asyncio.sleep(0)
+            release.set()
+            await asyncio.sleep(0.02)  # Inside the debounce window
+            late.append(asyncio.create_task(global_refresh()))
+            await asyncio.gather(first, *late)
+
+        assert len(calls) == 2
+        assert calls[1] - calls[0] >= 0.05
+
+    async def test_sequential_refreshes_each_run(self):
+        """Test that refreshes that don't overlap are not skipped."""
+        with patch("main._refresh_dashboards", new_callable=AsyncMock) as mock_refresh:
+            await global_refresh()
+            await global_refresh()
+
+        assert mock_refresh.call_count == 2
+
+    async def test_attendees_override_skips_fetch(self):
+        """Test that a known attendee state is rendered without calling the backend."""
+        with patch("main.get_current_office_attendees", new_callable=AsyncMock) as mock_fetch, \
+                patch("main.push_dashboards", new_callable=AsyncMock) as mock_push:
+            await global_refresh(attendees_override=[])
+
+        mock_fetch.assert_not_called()
+        embed = mock_push.call_args.args[0]
+        assert embed.description == "No one is currently in the office."
+
+    async def test_prebuilt_embed_is_pushed_without_fetch(self):
+        """Test that a clicked dashboard's embed goes through the shared refresh task."""
+        embed = discord.Embed(title="🏢 IEEE Office Presence")
+        with patch("main._refresh_dashboards", new_callable=AsyncMock) as mock_refresh, \
+                patch("main.push_dashboards", new_callable=AsyncMock) as mock_push:
+            await global_refresh(embed=embed, exclude=123)
+
+        mock_refresh.assert_not_called()
+        mock_push.assert_awaited_once_with(embed, exclude=123)
+
+    @patch("main.INTERACTION_FETCH_TIMEOUT", 0.01)
+    async def test_slow_click_defers_and_refreshes(self):
+        """Test that a click waiting on a slow backend is deferred before it expires."""
+        async def slow_build():
+            await asyncio.sleep(1)
+
+        interaction = MagicMock()
+        interaction.response.defer = AsyncMock()
+        interaction.response.edit_message = AsyncMock()
+        with patch.object(main.STATE, "last_refresh", None), \
+                patch("main.build_dashboard_embed", side_effect=slow_build), \
+                patch("main.global_refresh", new_callable=AsyncMock) as mock_refresh:
+            await main.ReadOnlyView().do_refresh(interaction)
+
+        interaction.response.defer.assert_awaited_once()
+        interaction.response.edit_message.assert_not_called()
+        mock_refresh.assert_awaited_once_with()
+
+    async def test_click_during_refresh_joins_it(self):
+        """Test that a click mid-refresh doesn't start a second fetch."""
+        interaction = MagicMock()
+        interaction.response.defer = AsyncMock()
+        running = asyncio.get_running_loop().create_future()
+        with patch.object(main.STATE, "last_refresh", None), \
+                patch.object(main.STATE, "task", running), \
+                patch("main.build_dashboard_embed", new_callable=AsyncMock) as mock_build, \
+                patch("main.global_refresh", new_callable=AsyncMock) as mock_refresh:
+            await main.ReadOnlyView().do_refresh(interaction)
+
+        mock_build.assert_not_called()
+        interaction.response.defer.assert_awaited_once()
+        mock_refresh.assert_awaited_once_with()
+
+
+class TestEmbedSignature:
+    """Test detection of unchanged dashboard content"""
+
+    def test_same_minute_matches(self):
+        """Test that identical content with the same footer minute matches."""
+        first = discord.Embed(title="Office", description="• **Alice**", color=0x2ECC71)
+        first.set_footer(text="Last update: 10:00")
+        second = discord.Embed(title="Office", description="• **Alice**", color=0x2ECC71)
+        second.set_footer(text="Last update: 10:00")
+
+        assert embed_signature(first) == embed_signature(second)
+
+    def test_new_minute_matches(self):
+        """Test that a footer minute change alone doesn't force a re-push."""
+        first = discord.Embed(title="Office", description="• **Alice**")
+        first.set_footer(text="Last update: 10:00")
+        second = discord.Embed(title="Office", description="• **Alice**")
+        second.set_footer(text="Last update: 10:01")
+
+        assert embed_signature(first) == embed_signature(second)
+
+    def test_content_change_is_detected(self):
+        """Test that a change in attendees or colour changes the signature."""
+        base = discord.Embed(title="Office", description="• **Alice**", color=0x2ECC71)
+
+        assert embed_signature(base) != embed_signature(
+            discord.Embed(title="Office", description="• **Bob**", color=0x2ECC71)
+        )
+        assert embed_signature(base) != embed_signature(
+            discord.Embed(title="Office", description="• **Alice**", color=0xE74C3C)
+        )
+
+    async def test_unchanged_dashboard_is_repushed_after_max_age(self):
+        """Test that unchanged content is skipped until DASHBOARD_MAX_AGE has passed."""
+        embed = discord.Embed(title="Office", description="• **Alice**")
+        signature = embed_signature(embed)
+        now = main.time.monotonic()
+
+        with patch.dict(main.PUSHED_DASHBOARDS, {123: (signature, now)}), \
+                patch.object(main.bot, "get_guild", return_value=None) as mock_get_guild:
+            await main._update_guild(123, embed, signature, now)
+            mock_get_guild.assert_not_called()
+
+            main.PUSHED_DASHBOARDS[123] = (signature, now - main.DASHBOARD_MAX_AGE)
+            await main._update_guild(123, embed, signature, now)
+            mock_get_guild.assert_called_once_with(123)
+
+    async def test_push_time_is_refresh_start(self):
+        """Test that the recorded push time excludes fetch and edit latency."""
+        embed = discord.Embed(title="Office", description="• **Alice**")
+        channel = MagicMock()
+        channel.get_partial_message.return_value.edit = AsyncMock()
+
+        with patch.dict(main.GUILD_MAPPING, {123: "control"}, clear=True), \
+                patch.dict(main.DASHBOARD_MESSAGES, {123: 1}), \
+                patch.dict(main.PUSHED_DASHBOARDS, clear=True), \
+                patch.object(main.STATE, "last_refresh", 100.0), \
+                patch.object(main.bot, "get_guild", return_value=MagicMock()), \
+                patch("main.get_tracker_channel", return_value=channel):
+            await main.push_dashboards(embed)
+            assert main.PUSHED_DASHBOARDS[123] == (embed_signature(embed), 100.0)
+
+
+class TestAutoRefreshInterval:
+    """Test the auto-refresh period schedule"""
+
+    @pytest.mark.parametrize("hour", [7, 12, 22])
+    def test_office_hours(self, hour):
+        """Test that office hours use the regular refresh period."""
+        assert auto_refresh_interval(datetime(2024, 1, 15, hour, 30)) == AUTO_REFRESH_INTERVAL
+
+    @pytest.mark.parametrize("hour", [23, 0, 6])
+    def test_off_hours(self, hour):
+        """Test that 11 PM - 7 AM uses the slower refresh period."""
+        assert auto_refresh_interval(datetime(2024, 1, 15, hour, 30)) == OFF_HOURS_REFRESH_INTERVAL
+
+
+class TestFormatVisit:
+    """Test visit line formatting"""
+
+    def test_format_visit_hours(self):
+        """Test that visits of an hour or more show hours."""
+        visit = {
+            "name": "Alice",
+            "signin_time": "2024-01-15T09:00:00",
+            "signout_time": "2024-01-15T11:30:00",
+        }
+
+        assert format_visit(visit) == "• **Alice** — 2024-01-15 09:00-11:30 (2.5h)"
+
+    def test_format_visit_minutes(self):
+        """Test that visits under an hour show minutes."""
+        visit = {
+            "name": "Bob",
+            "signin_time": "2024-01-15T09:00:00",
+            "signout_time": "2024-01-15T09:45:00",
+        }
+
+        assert format_visit(visit) == "• **Bob** — 2024-01-15 09:00-09:45 (45m)"
+
+    def test_format_visit_unparseable(self):
+        """Test fallback to raw values for missing or invalid timestamps."""
+        assert format_visit({"name": "Carol", "signin_time": "bad"}) == "• **Carol** — bad to "
+        assert format_visit({"signin_time": None, "signout_time": None}) == "• **Unknown** — None to None"
+        visit = {"name": "Dave", "signin_time": "2024-01-15T09:00:00Z", "signout_time": "2024-01-15T10:00:00"}
+        assert format_visit(visit) == "• **Dave** — 2024-01-15T09:00:00Z to 2024-01-15T10:00:00"
+
+
+class TestBuildLeaderboardEmbed:
+    """Test leaderboard embed formatting"""
+
+    def test_build_leaderboard_embed_lines(self):
+        """Test medals for the top three, numbered ranks after, and pluralization."""
+        leaderboard = [
+            {"name": name, "visits": visits, "total_hours": 1.25}
+            for name, visits in [("A", 3), ("B", 1), ("C", 2), ("D", 1)]
+        ]
+
+        embed = build_leaderboard_embed(leaderboard, "Test", days=7)
+
+        assert embed.description.split("\n") == [
+            "🥇 **A** — 3 visits (1.2h)",
+            "🥈 **B** — 1 visit (1.2h)",
+            "🥉 **C** — 2 visits (1.2h)",
+            "4. **D** — 1 visit (1.2h)",
+        ]
+        assert embed.footer.text == "Last 7 days • Excluding auto-signouts at 4 AM"
+
+
+class TestWeeklyReport:
+    """Test the weekly leaderboard report"""
+
+    async def test_build_weekly_report_embed(self):
+        """Test the weekly report intro and colour, and that no data means no embed."""
+        leaderboard = [{"name": "Alice", "visits": 2, "total_hours": 3.0}]
+        with patch("main.calculate_leaderboard", new_callable=AsyncMock, return_value=(leaderboard, None)):
+            embed, error = await build_weekly_report_embed()
+
+        assert error is None
+        assert embed.description.startswith("Here are the top office attendees from last week:\n\n🥇 **Alice**")
+        assert embed.color.value == 0x3498DB
+
+        with patch("main.calculate_leaderboard", new_callable=AsyncMock, return_value=([], None)):
+            assert await build_weekly_report_embed() == (None, None)
+
+
+class TestDayToRfc3339:
+    """Test date argument conversion for backend queries"""
+
+    def test_day_to_rfc3339(self):
+        """Test that a valid day gets the requested time suffix."""
+        assert day_to_rfc3339("2024-01-15", "T00:00:00Z") == "2024-01-15T00:00:00Z"
+        assert day_to_rfc3339("2024-01-31", "T23:59:59Z") == "2024-01-31T23:59:59Z"
+        assert day_to_rfc3339("2024-1-5", "T00:00:00Z") == "2024-01-05T00:00:00Z"
+
+    @pytest.mark.parametrize("day", ["2024-02-30", "15-01-2024", "20240115", "2024-W03-1", "tomorrow", ""])
+    def test_day_to_rfc3339_invalid(self, day):
+        """Test that invalid dates raise ValueError."""
+        with pytest.raises(ValueError):
+            day_to_rfc3339(day, "T00:00:00Z")
+
+
+class TestVisitHours:
+    """Test memoized visit duration parsing"""
+
+    def test_visit_hours(self):
+        """Test durations, including repeated (cached) lookups."""
+        assert visit_hours("2024-01-15T09:00:00", "2024-01-15T11:30:00") == 2.5
+        assert visit_hours("2024-01-15T09:00:00", "2024-01-15T11:30:00") == 2.5
+        assert visit_hours("2024-01-15T23:00:00", "2024-01-16T00:15:00") == 1.25
+
+    def test_visit_hours_invalid(self):
+        """Test that unparseable timestamps still raise instead of being cached."""
+        with pytest.raises(ValueError):
+            visit_hours("bad", "2024-01-15T11:30:00")
+        with pytest.raises(TypeError):
+            visit_hours(None, "2024-01-15T11:30:00")
+
+
+class TestPaginatedView:
+    """Test page footers of paginated views"""
+
+    async def test_page_footer_does_not_accumulate(self):
+        """Test that flipping pages back and forth keeps one page indicator."""
+        pages = [discord.Embed(title="Page A"), discord.Embed(title="Page B")]
+        pages[0].set_footer(text="Total: 2 member(s)")
+        view = PaginatedView(pages)
+
+        for page in (0, 1, 0, 1, 0):
+            view.current_page = page
+            embed = view.get_current_embed()
+
+        assert embed.footer.text == "Total: 2 member(s) • Page 1/2"
+        assert pages[1].footer.text == "Page 2/2"
+
+
+class TestCurrentAttendees:
+    """Test conditional fetching of the current attendees"""
+
+    @pytest.fixture(autouse=True)
+    def clear_current_response(self):
+        main._CURRENT_RESPONSE.update(etag=None, body=None, attendees=[])
+        invalidate_attendees_cache()
+        yield
+        main._CURRENT_RESPONSE.update(etag=None, body=None, attendees=[])
+        invalidate_attendees_cache()
+
+    @staticmethod
+    def mock_current_response(mock_session, status=200, body=b"[]", etag=None):
+        mock_response = MagicMock()
+        mock_response.status = status
+        mock_response.headers = {"ETag": etag} if etag else {}
+        mock_response.read = AsyncMock(return_value=body)
+        mock_session.get.return_value.__aenter__.return_value = mock_response
+        return mock_response
+
+    @patch("main.http_session")
+    async def test_not_modified_reuses_attendees(self, mock_session):
+        """Test that the ETag is sent back and a 304 reuses the parsed attendees."""
+        body = b'[{"name": "Alice", "signin_time": "2024-01-15T09:00:00"}]'
+        self.mock_current_response(mock_session, body=body, etag='"v1"')
+        first, ok = await get_current_office_attendees()
+        assert ok and first == [("Alice", "2024-01-15T09:00:00")]
+
+        invalidate_attendees_cache()
+        response = self.mock_current_response(mock_session, status=304)
+        second, ok = await get_current_office_attendees()
+
+        assert ok and second is first
+        assert mock_session.get.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+        response.read.assert_not_called()
+
+    @patch("main.http_session")
+    async def test_identical_body_skips_parse(self, mock_session):
+        """Test that without ETags an unchanged body returns the cached attendees."""
+        body = b'[{"name": "Bob", "signin_time": "2024-01-15T10:00:00"}]'
+        self.mock_current_response(mock_session, body=body)
+        first, _ = await get_current_office_attendees()
+
+        invalidate_attendees_cache()
+        self.mock_current_response(mock_session, body=body)
+        second, ok = await get_current_office_attendees()
+
+        assert ok and second is first
+        assert mock_session.get.call_args.kwargs["headers"] is None
+
+    @patch("main.http_session")
+    async def test_recent_result_is_reused(self, mock_session):
+        """Test that calls within the TTL share one request until invalidated."""
+        self.mock_current_response(mock_session, body=b"[]")
+
+        await get_current_office_attendees()
+        await get_current_office_attendees()
+        assert mock_session.get.call_count == 1
+
+        invalidate_attendees_cache()
+        await get_current_office_attendees()
+        assert mock_session.get.call_count == 2
+
+
+class TestCreatePages:
+    """Test splitting formatted items into embed pages"""
+
+    def test_create_pages_splits_items(self):
+        """Test that each page holds at most items_per_page lines, in order."""
+        pages = create_pages(list(range(5)), 2, "Numbers", formatter=str)
+
+        assert [page.description for page in pages] == ["0\n1", "2\n3", "4"]
+        assert all(page.title == "Numbers" for page in pages)
+
+    def test_create_pages_empty(self):
+        """Test that no items produce no pages."""
+        assert create_pages([], 20, "Empty", formatter=str) == []
+
+
+class TestBackendPost:
+    """Test retries and error replies of admin backend POSTs"""
+
+    @staticmethod
+    def mock_post_statuses(mock_session, *statuses):
+        """Make successive POSTs fail with the given statuses (None for success)."""
+        errors = [
+            aiohttp.ClientResponseError(MagicMock(), (), status=status) if status else None
+            for status in statuses
+        ]
+        mock_response = MagicMock()
+        mock_response.raise_for_status.side_effect = errors
+        mock_session.post.return_value.__aenter__.return_value = mock_response
+
+    @patch("main.BACKEND_RETRY_BACKOFF", 0)
+    @patch("main.http_session")
+    async def test_gateway_error_is_retried(self, mock_session):
+        """Test that a 503 is retried and the retry's success is reported."""
+        self.mock_post_statuses(mock_session, 503, None)
+        interaction = MagicMock()
+        interaction.followup.send = AsyncMock()
+
+        assert await backend_post(interaction, "signin_discord", "sign in member", {"discord_id": "1"})
+        assert mock_session.post.call_count == 2
+        interaction.followup.send.assert_not_called()
+
+    @patch("main.BACKEND_RETRY_BACKOFF", 0)
+    @patch("main.http_session")
+    async def test_gateway_timeout_is_not_retried(self, mock_session):
+        """Test that a 504 (request forwarded, possibly applied) isn't repeated."""
+        self.mock_post_statuses(mock_session, 504, None)
+        interaction = MagicMock()
+        interaction.followup.send = AsyncMock()
+
+        assert not await backend_post(interaction, "signin_discord", "sign in member", {"discord_id": "1"})
+        assert mock_session.post.call_count == 1
+        interaction.followup.send.assert_called_once()
+
+    @patch("main.BACKEND_RETRY_BACKOFF", 0)
+    @patch("main.http_session")
+    async def test_server_error_is_reported_without_retry(self, mock_session):
+        """Test that a 500 (possibly already applied) fails right away with a reply."""
+        self.mock_post_statuses(mock_session, 500)
+        interaction = MagicMock()
+        interaction.followup.send = AsyncMock()
+
+        assert not await backend_post(interaction, "signout_all", "sign out all members")
+        assert mock_session.post.call_count == 1
+        message = interaction.followup.send.call_args.args[0]
+        assert message.startswith("❌ Failed to sign out all members:")
+
+    @patch("main.BACKEND_RETRY_BACKOFF", 0)
+    @patch("main.http_session")
+    async def test_retries_are_bounded(self, mock_session):
+        """Test that persistent gateway errors stop after the configured retries."""
+        self.mock_post_statuses(mock_session, 502, 502, 502, None)
+        interaction = MagicMock()
+        interaction.followup.send = AsyncMock()
+
+        assert not await backend_post(interaction, "signout_discord", "sign out member")
+        assert mock_session.post.call_count == 3
+
+
+class TestMalformedBackendReplies:
+    """Test handling of backend responses that aren't valid JSON"""
+
+    @staticmethod
+    def mock_html_response(mock_session, method):
+        """Make `async with mock_session.<method>(...)` yield a successful non-JSON reply."""
+        mock_response = MagicMock()
+        mock_response.read = AsyncMock(return_value=b"<html>Bad Gateway</html>")
+        getattr(mock_session, method).return_value.__aenter__.return_value = mock_response
+
+    @patch("main.http_session")
+    async def test_command_reports_bad_body(self, mock_session):
+        """Test that a command replies with an error instead of crashing."""
+        self.mock_html_response(mock_session, "get")
+        interaction = MagicMock()
+        interaction.response.send_message = AsyncMock()
+
+        await main.members.callback(interaction)
+
+        message = interaction.response.send_message.call_args.args[0]
+        assert message.startswith("❌ Failed to fetch members:")
+
+    @patch("main.http_session")
+    async def test_leave_with_bad_body_still_refreshes(self, mock_session):
+        """Test that an unreadable reply to a successful sign-out doesn't undo it."""
+        self.mock_html_response(mock_session, "post")
+        interaction = MagicMock()
+        interaction.user.id = 42
+        interaction.response.defer = AsyncMock()
+
+        with patch.dict(main._user_leave_cooldown, clear=True), \
+                patch("main.invalidate_leaderboard_cache") as mock_invalidate, \
+                patch("main.global_refresh", new_callable=AsyncMock) as mock_refresh:
+            await main.ControlView().leave.callback(interaction)
+            assert 42 in main._user_leave_cooldown
+
+        mock_invalidate.assert_called_once()
+        mock_refresh.assert_awaited_once()